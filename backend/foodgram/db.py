@@ -0,0 +1,28 @@
+import time
+
+from django.conf import settings
+from django.core.signals import request_finished, request_started
+from django.db import connections
+from django.dispatch import receiver
+
+
+@receiver(request_finished)
+def mark_connections_idle(sender, **kwargs):
+    now = time.monotonic()
+    for connection in connections.all():
+        if connection.connection is not None:
+            connection.idle_since = now
+
+
+@receiver(request_started)
+def close_unusable_connections(sender, **kwargs):
+    now = time.monotonic()
+    for connection in connections.all():
+        idle_since = getattr(connection, 'idle_since', None)
+        if (connection.connection is not None
+                and connection.settings_dict.get('CONN_HEALTH_CHECKS')
+                and idle_since is not None
+                and now - idle_since
+                >= settings.CONN_HEALTH_CHECK_IDLE_SECONDS
+                and not connection.is_usable()):
+            connection.close()
@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 from dotenv import load_dotenv
 
@@ -24,11 +25,14 @@ INSTALLED_APPS = [
     'rest_framework.authtoken',
     'djoser',
 
+    'foodgram',
     'recipes',
     'users',
 ]
 
 MIDDLEWARE = [
+    'recipes.metrics.MetricsMiddleware',
+    'recipes.replicas.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -65,10 +69,67 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
         'HOST': os.getenv('DB_HOST'),
-        'PORT': os.getenv('DB_PORT')
+        'PORT': os.getenv('DB_PORT'),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': os.getenv(
+            'DB_CONN_HEALTH_CHECKS', 'true'
+        ).lower() == 'true',
+        'DISABLE_SERVER_SIDE_CURSORS': os.getenv(
+            'DB_PGBOUNCER_TRANSACTION_POOLING', 'false'
+        ).lower() == 'true',
     }
 }
 
+CONN_HEALTH_CHECK_IDLE_SECONDS = int(
+    os.getenv('DB_CONN_HEALTH_CHECK_IDLE_SECONDS', 10)
+)
+
+DATABASE_ROUTERS = ['recipes.replicas.ReplicaRouter']
+REPLICA_DATABASES = []
+for index, replica in enumerate(
+    filter(None, os.getenv('DB_REPLICAS', '').split(','))
+):
+    alias = f'replica{index + 1}'
+    DATABASES[alias] = dict(DATABASES['default'], TEST={'MIRROR': 'default'})
+    if (DATABASES['default']['ENGINE'] or '').endswith('sqlite3'):
+        DATABASES[alias]['NAME'] = replica
+    else:
+        host, _, port = replica.strip().partition(':')
+        DATABASES[alias]['HOST'] = host
+        DATABASES[alias]['PORT'] = port or DATABASES['default']['PORT']
+        DATABASES[alias]['OPTIONS'] = {
+            'connect_timeout': int(os.getenv('REPLICA_CONNECT_TIMEOUT', 2)),
+        }
+    REPLICA_DATABASES.append(alias)
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', 10))
+REPLICA_MAX_LAG_SECONDS = int(os.getenv('REPLICA_MAX_LAG_SECONDS', 5))
+REPLICA_CHECK_SECONDS = int(os.getenv('REPLICA_CHECK_SECONDS', 5))
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.filebased.FileBasedCache'
+        ),
+        'LOCATION': os.getenv(
+            'CACHE_LOCATION',
+            os.path.join(tempfile.gettempdir(), 'foodgram_cache')
+        ),
+    }
+}
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', 600))
+AUTH_TOKEN_CACHE_TIMEOUT = int(os.getenv('AUTH_TOKEN_CACHE_TIMEOUT', 300))
+AUTH_TOKEN_LOCAL_TIMEOUT = int(os.getenv('AUTH_TOKEN_LOCAL_TIMEOUT', 5))
+AUTH_TOKEN_LOCAL_SIZE = 10000
+METRICS_SLOW_REQUEST_SECONDS = float(
+    os.getenv('METRICS_SLOW_REQUEST_SECONDS', 1)
+)
+METRICS_QUERY_BUDGET = int(os.getenv('METRICS_QUERY_BUDGET', 20))
+METRICS_ALLOWED_IPS = os.getenv('METRICS_ALLOWED_IPS', '127.0.0.1').split(',')
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+METRICS_DIR = os.getenv('METRICS_DIR', '')
+METRICS_FLUSH_SECONDS = float(os.getenv('METRICS_FLUSH_SECONDS', 1))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -90,7 +151,7 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'recipes.authentication.CachedTokenAuthentication',
     ],
 
     'DEFAULT_FILTER_BACKENDS': [
@@ -134,5 +195,32 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+RECIPE_IMAGE_MAX_SIZE = int(os.getenv('RECIPE_IMAGE_MAX_SIZE', 5 * 1024 * 1024))
+DATA_UPLOAD_MAX_MEMORY_SIZE = RECIPE_IMAGE_MAX_SIZE * 2
+RECIPE_IMAGE_WORKERS = int(os.getenv('RECIPE_IMAGE_WORKERS', 2))
+RECIPE_IMAGE_QUALITY = 80
+RECIPE_IMAGE_VARIANTS = {
+    'small': (320, 320),
+    'medium': (800, 800),
+}
+
+RECIPE_TRENDING_HALF_LIFE_HOURS = float(
+    os.getenv('RECIPE_TRENDING_HALF_LIFE_HOURS', 24)
+)
+RECIPE_TRENDING_WINDOW_DAYS = int(os.getenv('RECIPE_TRENDING_WINDOW_DAYS', 7))
+RECIPE_SEARCH_CONFIG = os.getenv('RECIPE_SEARCH_CONFIG', 'russian')
+RECIPE_MATCHING_REFRESH_SECONDS = int(
+    os.getenv('RECIPE_MATCHING_REFRESH_SECONDS', 60)
+)
+FEED_FANOUT_MAX_FOLLOWERS = int(os.getenv('FEED_FANOUT_MAX_FOLLOWERS', 10000))
+SHOPPING_CART_SPOOL_SIZE = int(
+    os.getenv('SHOPPING_CART_SPOOL_SIZE', 1024 * 1024)
+)
+SHOPPING_CART_PDF_FONT = os.getenv(
+    'SHOPPING_CART_PDF_FONT',
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'
+)
+BULK_MAX_IDS = int(os.getenv('BULK_MAX_IDS', 100))
+
 DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
 AUTHENTICATION_BACKENDS = ['django.contrib.auth.backends.ModelBackend']
@@ -1,8 +1,11 @@
 from django.contrib import admin
 from django.urls import include, path
 
+from recipes.metrics import metrics
+
 urlpatterns = [
     path('api/', include('recipes.urls')),
     path('admin/', admin.site.urls),
     path('api/auth/', include('djoser.urls.authtoken')),
+    path('metrics', metrics, name='metrics'),
 ]
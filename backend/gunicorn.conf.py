@@ -0,0 +1,31 @@
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('GUNICORN_WORKERS',
+                        multiprocessing.cpu_count() * 2 + 1))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS',
+                         'uvicorn.workers.UvicornWorker')
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 1000))
+
+metrics_dir = os.environ.setdefault(
+    'METRICS_DIR', os.path.join(tempfile.gettempdir(), 'foodgram_metrics')
+)
+
+
+def on_starting(server):
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+
+
+def worker_exit(server, worker):
+    metrics = sys.modules.get('recipes.metrics')
+    if metrics is not None:
+        metrics.registry.flush(force=True)
@@ -1,4 +1,6 @@
 from django.contrib import admin
+from django.db import transaction
+from django.db.models import Count
 
 from .models import (Favorites, Follow, Ingredient, IngredientInRecipe,
                      Purchase, Recipe, Tag)
@@ -7,47 +9,79 @@ from .models import (Favorites, Follow, Ingredient, IngredientInRecipe,
 class IngredientAdmin(admin.ModelAdmin):
     list_display = ('id', 'name', 'measurement_unit')
     search_fields = ('^name',)
-    list_filter = ('name',)
+    list_filter = ('measurement_unit',)
 
 
 class IngredientInRecipeAdmin(admin.TabularInline):
     model = IngredientInRecipe
     fk_name = 'recipe'
     min_num = 1
+    autocomplete_fields = ('ingredient',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'recipe', 'ingredient'
+        )
 
 
 class RecipeAdmin(admin.ModelAdmin):
-    list_display = ('author', 'name', 'favorited')
-    list_filter = ('author', 'name', 'tags')
+    list_display = ('author', 'name', 'favorites_count', 'purchases_count')
+    list_filter = ('tags',)
+    list_select_related = ('author',)
+    search_fields = ('name', 'author__username', 'author__email')
+    autocomplete_fields = ('author',)
+    show_full_result_count = False
     exclude = ('ingredients',)
 
     inlines = [
         IngredientInRecipeAdmin,
     ]
 
-    def favorited(self, obj):
-        favorited_count = Favorites.objects.filter(recipe=obj).count()
-        return favorited_count
-
 
 class TagAdmin(admin.ModelAdmin):
-    list_display = ('name', 'color', 'slug')
+    list_display = ('name', 'color', 'slug', 'recipes_count')
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            recipes_count=Count('recipes')
+        )
+
+    @admin.display(description='Рецептов', ordering='recipes_count')
+    def recipes_count(self, obj):
+        return obj.recipes_count
 
 
 class PurchaseAdmin(admin.ModelAdmin):
     list_display = ('user', 'recipe')
+    list_select_related = ('user', 'recipe')
+    autocomplete_fields = ('user', 'recipe')
+    search_fields = ('user__username', 'recipe__name')
+    show_full_result_count = False
 
 
-class FavoriteAdmin(admin.ModelAdmin):
-    list_display = ('user', 'recipe')
+class FavoriteAdmin(PurchaseAdmin):
+    pass
 
 
 class SubscriptionAdmin(admin.ModelAdmin):
     list_display = ('author', 'user')
+    list_select_related = ('author', 'user')
+    autocomplete_fields = ('author', 'user')
+    search_fields = ('author__username', 'user__username')
+    show_full_result_count = False
 
 
 class RecipeIngredientAdmin(admin.ModelAdmin):
     list_display = ('recipe', 'ingredient', 'amount')
+    list_select_related = ('recipe', 'ingredient')
+    autocomplete_fields = ('recipe', 'ingredient')
+    search_fields = ('recipe__name', '^ingredient__name')
+    show_full_result_count = False
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            for obj in queryset:
+                obj.delete()
 
 
 admin.site.register(Ingredient, IngredientAdmin)
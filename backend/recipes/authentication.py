@@ -0,0 +1,92 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.authentication import TokenAuthentication
+
+TOKEN_KEY = 'auth:token:{}'
+UNCACHED_USER_FIELDS = ('password', 'recipes_count', 'followers_count')
+
+
+class LocalTokenCache:
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (
+                time.monotonic() + settings.AUTH_TOKEN_LOCAL_TIMEOUT, value
+            )
+            self.entries.move_to_end(key)
+            while len(self.entries) > settings.AUTH_TOKEN_LOCAL_SIZE:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+
+local_cache = LocalTokenCache()
+
+
+def get_cache_key(key):
+    return TOKEN_KEY.format(hashlib.sha256(key.encode()).hexdigest())
+
+
+def invalidate_tokens(keys):
+    keys = list(keys)
+    for key in keys:
+        local_cache.delete(key)
+    cache.delete_many([get_cache_key(key) for key in keys])
+
+
+def dump_user(user):
+    return {
+        field.attname: getattr(user, field.attname)
+        for field in user._meta.concrete_fields
+        if field.name not in UNCACHED_USER_FIELDS
+    }
+
+
+def load_user(data):
+    model = get_user_model()
+    fields = [
+        field.attname for field in model._meta.concrete_fields
+        if field.attname in data
+    ]
+    return model.from_db(
+        DEFAULT_DB_ALIAS, fields, [data[name] for name in fields]
+    )
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        data = local_cache.get(key)
+        if data is None:
+            cache_key = get_cache_key(key)
+            data = cache.get(cache_key)
+            if data is None:
+                user, token = super().authenticate_credentials(key)
+                data = dump_user(user)
+                cache.set(cache_key, data, settings.AUTH_TOKEN_CACHE_TIMEOUT)
+            local_cache.set(key, data)
+        user = load_user(data)
+        return user, self.get_model()(key=key, user=user)
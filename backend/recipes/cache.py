@@ -0,0 +1,91 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from .replicas import primary
+
+VERSION_KEY = 'api:version:{}'
+RESPONSE_KEY = 'api:response:{}'
+
+
+def get_versions(namespaces):
+    keys = [VERSION_KEY.format(namespace) for namespace in namespaces]
+    versions = cache.get_many(keys)
+    missing = {key: time.time() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def bump_versions(*namespaces):
+    now = time.time()
+    transaction.on_commit(lambda: cache.set_many(
+        {VERSION_KEY.format(namespace): now for namespace in namespaces},
+        None,
+    ))
+
+
+class CachedResponseMixin:
+    cache_namespaces = ()
+    cache_actions = ('list', 'retrieve')
+    cache_anonymous_only = False
+
+    def is_response_cacheable(self, request):
+        if self.action not in self.cache_actions:
+            return False
+        return not self.cache_anonymous_only or request.user.is_anonymous
+
+    def get_cache_namespaces(self, request):
+        return self.cache_namespaces
+
+    def get_cache_key(self, request):
+        return request.build_absolute_uri()
+
+    def get_cached_response(self, request, handler, *args, **kwargs):
+        if not self.is_response_cacheable(request):
+            return handler(request, *args, **kwargs)
+        versions = get_versions(self.get_cache_namespaces(request))
+        digest = hashlib.md5('{}:{}'.format(
+            versions, self.get_cache_key(request)
+        ).encode()).hexdigest()
+        etag = quote_etag(digest)
+        last_modified = int(max(versions))
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if not_modified is not None:
+            return not_modified
+        key = RESPONSE_KEY.format(digest)
+        data = cache.get(key)
+        if data is None:
+            if time.time() - last_modified < settings.REPLICA_MAX_LAG_SECONDS:
+                with primary():
+                    response = handler(request, *args, **kwargs)
+            else:
+                response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            data = response.data
+            cache.set(key, data, settings.API_CACHE_TIMEOUT)
+        response = Response(data)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            request, super().list, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            request, super().retrieve, *args, **kwargs
+        )
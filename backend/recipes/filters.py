@@ -1,6 +1,8 @@
 import django_filters as filters
+from rest_framework.filters import BaseFilterBackend
 
 from .models import Ingredient, Recipe, User, Tag
+from .search import search_recipes
 
 
 class IngredientNameFilter(filters.FilterSet):
@@ -24,3 +26,39 @@ class RecipeFilter(filters.FilterSet):
     class Meta:
         model = Recipe
         fields = ('tags', 'author')
+
+
+class RecipeSearchFilter(BaseFilterBackend):
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        return search_recipes(queryset, query)
+
+
+class RecipeOrderingFilter(BaseFilterBackend):
+    ordering_param = 'ordering'
+    search_param = RecipeSearchFilter.search_param
+    orderings = {
+        'popular': ('-favorites_count', '-id'),
+        'trending': ('-trending_score', '-id'),
+        'cooking_time': ('cooking_time', 'id'),
+    }
+    counter_orderings = ('popular', 'trending')
+    default_ordering = ('-pub_date', '-id')
+    search_ordering = ('-search_rank', '-id')
+
+    def get_ordering(self, request, queryset, view):
+        ordering = request.query_params.get(self.ordering_param)
+        if ordering in self.orderings:
+            return self.orderings[ordering]
+        if request.query_params.get(self.search_param, '').strip():
+            return self.search_ordering
+        return self.default_ordering
+
+    def filter_queryset(self, request, queryset, view):
+        return queryset.order_by(
+            *self.get_ordering(request, queryset, view)
+        )
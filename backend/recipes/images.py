@@ -0,0 +1,103 @@
+import base64
+import binascii
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.db import close_old_connections, transaction
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageOps
+from rest_framework import serializers
+
+from .cache import bump_versions
+
+logger = logging.getLogger(__name__)
+
+BASE64_CHUNK_SIZE = 64 * 1024
+VARIANT_FORMATS = (
+    ('webp', 'WEBP'),
+    ('jpg', 'JPEG'),
+)
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.RECIPE_IMAGE_WORKERS,
+    thread_name_prefix='recipe-images',
+)
+
+
+def decode_base64_image(data):
+    header, encoded = data.split(';base64,', 1)
+    ext = header.split('/')[-1]
+    encoded = ''.join(encoded.split())
+    if len(encoded) * 3 // 4 > settings.RECIPE_IMAGE_MAX_SIZE:
+        raise serializers.ValidationError(
+            'Размер изображения не должен превышать '
+            f'{filesizeformat(settings.RECIPE_IMAGE_MAX_SIZE)}'
+        )
+    image = TemporaryUploadedFile(
+        'temp.' + ext, f'image/{ext}', 0, None
+    )
+    try:
+        for start in range(0, len(encoded), BASE64_CHUNK_SIZE):
+            image.write(base64.b64decode(
+                encoded[start:start + BASE64_CHUNK_SIZE], validate=True
+            ))
+    except binascii.Error:
+        image.close()
+        raise serializers.ValidationError('Некорректное изображение')
+    image.size = image.tell()
+    image.seek(0)
+    return image
+
+
+def generate_image_variants(recipe_id):
+    from .models import Recipe
+
+    recipe = Recipe.objects.only('image', 'image_variants').get(pk=recipe_id)
+    stem = os.path.splitext(os.path.basename(recipe.image.name))[0]
+    variants = {}
+    with recipe.image.open('rb') as f, Image.open(f) as original:
+        original = ImageOps.exif_transpose(original).convert('RGB')
+        for variant, size in settings.RECIPE_IMAGE_VARIANTS.items():
+            image = original.copy()
+            image.thumbnail(size)
+            variants[variant] = {}
+            for ext, image_format in VARIANT_FORMATS:
+                buffer = BytesIO()
+                image.save(buffer, image_format,
+                           quality=settings.RECIPE_IMAGE_QUALITY)
+                variants[variant][ext] = default_storage.save(
+                    f'recipes/variants/{stem}_{variant}.{ext}',
+                    ContentFile(buffer.getvalue()),
+                )
+    updated = Recipe.objects.filter(
+        pk=recipe_id, image=recipe.image.name
+    ).update(image_variants=variants)
+    if updated:
+        bump_versions('recipes')
+    stale = recipe.image_variants if updated else variants
+    for formats in stale.values():
+        for name in formats.values():
+            default_storage.delete(name)
+
+
+def run_image_variants(recipe_id):
+    close_old_connections()
+    try:
+        generate_image_variants(recipe_id)
+    except Exception:
+        logger.exception('Не удалось обработать изображение рецепта %s',
+                         recipe_id)
+    finally:
+        close_old_connections()
+
+
+def schedule_image_variants(recipe_id):
+    transaction.on_commit(
+        lambda: executor.submit(run_image_variants, recipe_id)
+    )
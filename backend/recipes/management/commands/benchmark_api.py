@@ -0,0 +1,230 @@
+import base64
+import json
+import os
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from io import BytesIO
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (CaptureQueriesContext, override_settings,
+                               setup_test_environment,
+                               teardown_test_environment)
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes import images
+from recipes.management.commands.load_ingredients import DEFAULT_PATH
+from recipes.models import Ingredient, User
+from recipes.seeding import seed_database
+
+BENCHMARK_SETTINGS = {
+    'CACHES': {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    },
+    'METRICS_QUERY_BUDGET': float('inf'),
+    'METRICS_SLOW_REQUEST_SECONDS': float('inf'),
+    'REPLICA_DATABASES': [],
+}
+
+
+class Command(BaseCommand):
+    help = ('Заполняет тестовую базу синтетическими данными и замеряет '
+            'основные эндпоинты API')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--recipes', type=int, default=2000)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+        parser.add_argument('--follows', type=int, default=10,
+                            help='Подписок на пользователя')
+        parser.add_argument('--favorites', type=int, default=20,
+                            help='Рецептов в избранном на пользователя')
+        parser.add_argument('--cart', type=int, default=10,
+                            help='Рецептов в списке покупок на пользователя')
+        parser.add_argument('--requests', type=int, default=50,
+                            help='Запросов к каждому эндпоинту')
+        parser.add_argument('--memory-requests', type=int, default=5,
+                            help='Запросов для замера памяти')
+        parser.add_argument('--ingredients-path', default=DEFAULT_PATH)
+        parser.add_argument('--output', default='benchmark.json')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def seed(self, options, rng):
+        try:
+            return seed_database(
+                rng, users=options['users'], recipes=options['recipes'],
+                ingredients_per_recipe=options['ingredients_per_recipe'],
+                follows=options['follows'], favorites=options['favorites'],
+                cart=options['cart'],
+                ingredients_path=options['ingredients_path'],
+            )
+        except ValueError as error:
+            raise CommandError(error)
+
+    def get_image(self):
+        buffer = BytesIO()
+        Image.new('RGB', (640, 480), (200, 120, 40)).save(buffer, 'JPEG')
+        return ('data:image/jpeg;base64,'
+                + base64.b64encode(buffer.getvalue()).decode())
+
+    def get_endpoints(self, user, recipe_ids, ingredient_ids, tags, rng):
+        names = list(Ingredient.objects.values_list('name', flat=True)[:100])
+        image = self.get_image()
+        own_recipes = []
+
+        def recipe_data():
+            return {
+                'name': 'Новый рецепт',
+                'text': 'Описание',
+                'cooking_time': rng.randint(1, 120),
+                'image': image,
+                'tags': [rng.choice(tags).id],
+                'ingredients': [
+                    {'id': ingredient_id, 'amount': rng.randint(1, 500)}
+                    for ingredient_id in rng.sample(ingredient_ids, 8)
+                ],
+            }
+
+        def create(client):
+            response = client.post('/api/recipes/', recipe_data(),
+                                   format='json')
+            own_recipes.append(response.data['id'])
+            return response
+
+        def update(client):
+            recipe_id = rng.choice(own_recipes)
+            data = recipe_data()
+            del data['image']
+            return client.patch(f'/api/recipes/{recipe_id}/', data,
+                                format='json')
+
+        def get(url):
+            return lambda client: client.get(url(), HTTP_REFERER='/')
+
+        return [
+            ('recipes-list', True, get(lambda: '/api/recipes/')),
+            ('recipes-list-anonymous', False, get(lambda: '/api/recipes/')),
+            ('recipes-detail', True, get(
+                lambda: f'/api/recipes/{rng.choice(recipe_ids)}/')),
+            ('users-subscriptions', True, get(
+                lambda: '/api/users/subscriptions/?recipes_limit=3')),
+            ('recipes-download-shopping-cart', True, get(
+                lambda: '/api/recipes/download_shopping_cart/')),
+            ('ingredients-search', False, get(
+                lambda: f'/api/ingredients/?name={rng.choice(names)[:3]}')),
+            ('recipes-create', True, create),
+            ('recipes-update', True, update),
+        ]
+
+    def request(self, func, client):
+        response = func(client)
+        if response.status_code >= 400:
+            raise CommandError(
+                f'{response.status_code}: {getattr(response, "data", "")}'
+            )
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response
+
+    def measure(self, func, client, options):
+        timings, queries = [], []
+        for _ in range(options['requests']):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                self.request(func, client)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries.append(len(captured))
+        memory = []
+        for _ in range(options['memory_requests']):
+            tracemalloc.start()
+            self.request(func, client)
+            memory.append(tracemalloc.get_traced_memory()[1] / 1024)
+            tracemalloc.stop()
+        percentiles = statistics.quantiles(timings, n=100,
+                                           method='inclusive')
+        return {
+            'requests': len(timings),
+            'p50_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(percentiles[94], 2),
+            'p99_ms': round(percentiles[98], 2),
+            'queries_avg': round(statistics.mean(queries), 2),
+            'queries_max': max(queries),
+            'memory_peak_kb': round(statistics.mean(memory), 1)
+            if memory else None,
+        }
+
+    def get_revision(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', 'HEAD'], capture_output=True,
+                text=True, check=True, cwd=settings.BASE_DIR,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def run(self, options):
+        rng = random.Random(options['seed'])
+        started = time.perf_counter()
+        user_ids, recipe_ids, ingredient_ids, tags = self.seed(options, rng)
+        seed_time = time.perf_counter() - started
+        user = User.objects.get(pk=user_ids[0])
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}'
+        )
+        anonymous = APIClient()
+        results = {}
+        for name, authenticated, func in self.get_endpoints(
+            user, recipe_ids, ingredient_ids, tags, rng
+        ):
+            results[name] = self.measure(
+                func, client if authenticated else anonymous, options
+            )
+            self.stdout.write(
+                '{:<32} p50 {p50_ms:>8} мс  p95 {p95_ms:>8} мс  '
+                'p99 {p99_ms:>8} мс  SQL {queries_avg:>6}  '
+                'память {memory_peak_kb} КБ'.format(name, **results[name])
+            )
+        images.executor.shutdown(wait=True)
+        return {
+            'revision': self.get_revision(),
+            'database': connection.vendor,
+            'seed_seconds': round(seed_time, 2),
+            'options': {
+                key: options[key] for key in (
+                    'users', 'recipes', 'ingredients_per_recipe', 'follows',
+                    'favorites', 'cart', 'requests', 'memory_requests',
+                    'seed',
+                )
+            },
+            'endpoints': results,
+        }
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        with tempfile.TemporaryDirectory() as tmp:
+            if connection.vendor == 'sqlite':
+                connection.settings_dict['TEST']['NAME'] = os.path.join(
+                    tmp, 'benchmark.sqlite3'
+                )
+            old_name = connection.creation.create_test_db(verbosity=0)
+            try:
+                with override_settings(MEDIA_ROOT=tmp, **BENCHMARK_SETTINGS):
+                    report = self.run(options)
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                teardown_test_environment()
+        with open(options['output'], 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(
+            f'Результаты сохранены в {options["output"]}'
+        ))
@@ -0,0 +1,80 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.signals import request_finished, request_started
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+
+from recipes.models import Tag
+
+MODES = (
+    ('Без постоянных соединений', 0, False, None),
+    ('Постоянные соединения', None, False, None),
+    ('Проверка после простоя', None, True, None),
+    ('Проверка перед каждым запросом', None, True, 0),
+)
+
+
+class Command(BaseCommand):
+    help = ('Замеряет накладные расходы на соединение с базой '
+            'в цикле запроса с постоянными соединениями и без них')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--queries', type=int, default=3,
+                            help='SQL-запросов на запрос')
+
+    def run(self, options, max_age, health_checks, idle_seconds):
+        opened = []
+
+        def count_connection(sender, **kwargs):
+            opened.append(sender)
+
+        connection.close()
+        connection.settings_dict['CONN_MAX_AGE'] = max_age
+        connection.settings_dict['CONN_HEALTH_CHECKS'] = health_checks
+        connection_created.connect(count_connection)
+        if idle_seconds is None:
+            idle_seconds = settings.CONN_HEALTH_CHECK_IDLE_SECONDS
+        timings = []
+        try:
+            with override_settings(
+                CONN_HEALTH_CHECK_IDLE_SECONDS=idle_seconds
+            ):
+                for _ in range(options['requests']):
+                    started = time.perf_counter()
+                    request_started.send(sender=self.__class__)
+                    for _ in range(options['queries']):
+                        Tag.objects.exists()
+                    request_finished.send(sender=self.__class__)
+                    timings.append((time.perf_counter() - started) * 1000)
+        finally:
+            connection_created.disconnect(count_connection)
+            connection.close()
+        timings.sort()
+        return (statistics.median(timings),
+                timings[int(len(timings) * 0.95) - 1], len(opened))
+
+    def handle(self, *args, **options):
+        settings_dict = connection.settings_dict
+        initial = (settings_dict['CONN_MAX_AGE'],
+                   settings_dict.get('CONN_HEALTH_CHECKS', False))
+        self.stdout.write(
+            f'База: {connection.vendor}, запросов: {options["requests"]}, '
+            f'SQL на запрос: {options["queries"]}'
+        )
+        try:
+            for name, max_age, health_checks, idle_seconds in MODES:
+                p50, p95, opened = self.run(
+                    options, max_age, health_checks, idle_seconds
+                )
+                self.stdout.write(
+                    f'{name:<36} p50 {p50:.3f} мс  p95 {p95:.3f} мс  '
+                    f'соединений открыто: {opened}'
+                )
+        finally:
+            (settings_dict['CONN_MAX_AGE'],
+             settings_dict['CONN_HEALTH_CHECKS']) = initial
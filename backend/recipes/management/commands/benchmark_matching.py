@@ -0,0 +1,103 @@
+import random
+import statistics
+import time
+from itertools import accumulate
+
+from django.core.management.base import BaseCommand
+
+from recipes.matching import IngredientIndex
+
+
+class Command(BaseCommand):
+    help = ('Замеряет подбор рецептов по ингредиентам '
+            'на синтетическом каталоге')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=100000)
+        parser.add_argument('--ingredients', type=int, default=2000)
+        parser.add_argument('--per-recipe', type=int, default=8)
+        parser.add_argument('--have', type=int, default=15,
+                            help='Ингредиентов в одном запросе')
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--limit', type=int, default=6,
+                            help='Рецептов на странице результатов')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def generate_catalogue(self, options, rng):
+        ingredient_ids = range(1, options['ingredients'] + 1)
+        cum_weights = list(accumulate(1 / rank for rank in ingredient_ids))
+        catalogue = {}
+        for recipe_id in range(1, options['recipes'] + 1):
+            ingredients = set()
+            while len(ingredients) < options['per_recipe']:
+                ingredients.update(rng.choices(
+                    ingredient_ids, cum_weights=cum_weights,
+                    k=options['per_recipe'] - len(ingredients),
+                ))
+            catalogue[recipe_id] = ingredients
+        return catalogue
+
+    def brute_force(self, catalogue, have):
+        results = []
+        for recipe_id, ingredients in catalogue.items():
+            matched = len(ingredients & have)
+            if matched:
+                results.append(
+                    (recipe_id, matched, len(ingredients) - matched)
+                )
+        results.sort(key=lambda item: (item[2], -item[1], -item[0]))
+        return results
+
+    def measure(self, func, queries):
+        timings = []
+        for have in queries:
+            started = time.perf_counter()
+            func(have)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        return (statistics.median(timings),
+                timings[int(len(timings) * 0.95) - 1])
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        catalogue = self.generate_catalogue(options, rng)
+        queries = [
+            set(rng.sample(range(1, options['ingredients'] + 1),
+                           options['have']))
+            for _ in range(options['queries'])
+        ]
+
+        index = IngredientIndex()
+        started = time.perf_counter()
+        index.build(
+            (ingredient_id, recipe_id)
+            for recipe_id, ingredients in catalogue.items()
+            for ingredient_id in ingredients
+        )
+        build_time = time.perf_counter() - started
+        results = index.match(queries[0])
+        if results[:len(results)] != self.brute_force(catalogue, queries[0]):
+            self.stderr.write('Результаты индекса и перебора различаются')
+
+        updated = rng.sample(list(catalogue), min(1000, len(catalogue)))
+        started = time.perf_counter()
+        for recipe_id in updated:
+            index.set_recipe(recipe_id, catalogue[recipe_id])
+        update_time = (time.perf_counter() - started) * 1000 / len(updated)
+
+        index_p50, index_p95 = self.measure(
+            lambda have: index.match(have)[:options['limit']], queries
+        )
+        brute_p50, brute_p95 = self.measure(
+            lambda have: self.brute_force(catalogue, have)[:options['limit']],
+            queries,
+        )
+        self.stdout.write(
+            f'Рецептов: {options["recipes"]}, '
+            f'ингредиентов: {options["ingredients"]}, '
+            f'запросов: {options["queries"]}\n'
+            f'Построение индекса: {build_time:.2f} с\n'
+            f'Обновление рецепта: {update_time:.3f} мс\n'
+            f'Индекс: p50 {index_p50:.2f} мс, p95 {index_p95:.2f} мс\n'
+            f'Перебор: p50 {brute_p50:.2f} мс, p95 {brute_p95:.2f} мс'
+        )
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from recipes.images import generate_image_variants
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Создает уменьшенные копии изображений рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Пересоздать копии для всех рецептов',
+        )
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.order_by('id')
+        if not options['all']:
+            recipes = recipes.filter(image_variants={})
+        done = 0
+        for recipe_id in recipes.values_list('id', flat=True).iterator():
+            try:
+                generate_image_variants(recipe_id)
+            except (OSError, ValueError) as error:
+                self.stderr.write(f'Рецепт {recipe_id}: {error}')
+                continue
+            done += 1
+        self.stdout.write(self.style.SUCCESS(f'Обработано рецептов: {done}'))
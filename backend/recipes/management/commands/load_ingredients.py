@@ -1,20 +1,95 @@
 import csv
+import json
+import os
+import time
+from itertools import islice
 
-from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+CSV_HEADER = ('name', 'measurement_unit')
+DEFAULT_PATH = os.path.join(settings.BASE_DIR, '.data', 'ingredients.csv')
 
 
 class Command(BaseCommand):
+    help = 'Загружает ингредиенты из CSV или JSON файла'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=DEFAULT_PATH,
+            help='Путь к файлу ingredients.csv или ingredients.json',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество строк в одном INSERT',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Прочитать файл без записи в базу',
+        )
+
+    def read_csv(self, f):
+        for row in csv.reader(f):
+            if len(row) < 2 or tuple(row[:2]) == CSV_HEADER:
+                continue
+            yield row[0].strip(), row[1].strip()
+
+    def read_json(self, f):
+        for item in json.load(f):
+            yield item['name'].strip(), item['measurement_unit'].strip()
+
+    def read_rows(self, f, path):
+        extension = os.path.splitext(path)[1].lower()
+        if extension not in ('.csv', '.json'):
+            first_char = f.read(1)
+            while first_char.isspace():
+                first_char = f.read(1)
+            f.seek(0)
+            extension = '.json' if first_char == '[' else '.csv'
+        if extension == '.json':
+            return self.read_json(f)
+        return self.read_csv(f)
 
-    def load_ingredients(self):
+    def load_ingredients(self, path, batch_size, dry_run):
         from recipes.models import Ingredient
-        with open(r'.data/ingredients.csv', encoding='utf-8') as f:
-            reader = csv.reader(f)
-            next(reader, None)
-            for row in reader:
-                ingredient = Ingredient(
-                    name=row[0], measurement_unit=row[1]
-                )
-                ingredient.save()
+        total = 0
+        with open(path, encoding='utf-8') as f, transaction.atomic():
+            count_before = Ingredient.objects.count()
+            rows = self.read_rows(f, path)
+            while True:
+                batch = [
+                    Ingredient(name=name, measurement_unit=measurement_unit)
+                    for name, measurement_unit in islice(rows, batch_size)
+                ]
+                if not batch:
+                    break
+                total += len(batch)
+                if not dry_run:
+                    Ingredient.objects.bulk_create(
+                        batch, ignore_conflicts=True
+                    )
+            created = Ingredient.objects.count() - count_before
+        return total, created
 
     def handle(self, *args, **options):
-        self.load_ingredients()
+        path = options['path']
+        batch_size = options['batch_size']
+        if not os.path.exists(path):
+            raise CommandError(f'Файл {path} не найден')
+        if batch_size <= 0:
+            raise CommandError('--batch-size должен быть больше 0')
+        started = time.monotonic()
+        total, created = self.load_ingredients(
+            path, batch_size, options['dry_run']
+        )
+        elapsed = time.monotonic() - started
+        rate = total / elapsed if elapsed else total
+        self.stdout.write(self.style.SUCCESS(
+            f'Прочитано строк: {total}, добавлено: {created}, '
+            f'{elapsed:.3f} с ({rate:.0f} строк/с)'
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from recipes.models import recompute_counters
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает счётчики избранного, покупок, '
+            'рецептов и подписчиков')
+
+    def handle(self, *args, **options):
+        recipes, users = recompute_counters()
+        self.stdout.write(self.style.SUCCESS(
+            f'Обновлено рецептов: {recipes}, пользователей: {users}'
+        ))
@@ -0,0 +1,56 @@
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from recipes.cache import bump_versions
+from recipes.models import Favorites, Purchase, Recipe
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает рейтинг популярности рецептов по добавлениям '
+            'в избранное и список покупок. Запускается периодически')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество рецептов в одном UPDATE',
+        )
+
+    def get_scores(self, now):
+        half_life = settings.RECIPE_TRENDING_HALF_LIFE_HOURS * 3600
+        since = now - timedelta(days=settings.RECIPE_TRENDING_WINDOW_DAYS)
+        scores = defaultdict(float)
+        for model in (Favorites, Purchase):
+            events = model.objects.filter(
+                date_added__gt=since
+            ).values_list('recipe_id', 'date_added').order_by()
+            for recipe_id, date_added in events.iterator():
+                age = (now - date_added).total_seconds()
+                scores[recipe_id] += 0.5 ** (max(age, 0) / half_life)
+        return scores
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        scores = self.get_scores(timezone.now())
+        with transaction.atomic():
+            Recipe.objects.filter(
+                trending_score__gt=0
+            ).update(trending_score=0)
+            Recipe.objects.bulk_update(
+                [Recipe(pk=pk, trending_score=score)
+                 for pk, score in scores.items()],
+                ['trending_score'],
+                batch_size=options['batch_size'],
+            )
+            bump_versions('recipe-counters')
+        self.stdout.write(self.style.SUCCESS(
+            f'Обновлено рецептов: {len(scores)}, '
+            f'{time.monotonic() - started:.3f} с'
+        ))
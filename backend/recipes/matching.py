@@ -0,0 +1,133 @@
+import heapq
+import threading
+import time
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from .models import IngredientInRecipe
+from .transactions import on_commit_batch
+
+VERSION_KEY = 'matching:version'
+
+
+def get_rank(item):
+    recipe_id, matched, missing = item
+    return -missing, matched, recipe_id
+
+
+class MatchResults:
+    def __init__(self, items):
+        self.items = items
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop, step = index.indices(len(self.items))
+        return heapq.nlargest(stop, self.items, key=get_rank)[start:stop:step]
+
+
+class IngredientIndex:
+    def __init__(self):
+        self.postings = {}
+        self.recipes = {}
+        self.version = None
+        self.built_at = None
+        self.lock = threading.Lock()
+
+    def build(self, rows):
+        postings = {}
+        recipes = {}
+        for ingredient_id, recipe_id in rows:
+            postings.setdefault(ingredient_id, array('l')).append(recipe_id)
+            recipes.setdefault(recipe_id, []).append(ingredient_id)
+        for recipe_ids in postings.values():
+            recipe_ids[:] = array('l', sorted(recipe_ids))
+        with self.lock:
+            self.postings = postings
+            self.recipes = {
+                recipe_id: tuple(ingredient_ids)
+                for recipe_id, ingredient_ids in recipes.items()
+            }
+            self.built_at = time.monotonic()
+
+    def set_recipe(self, recipe_id, ingredient_ids):
+        ingredient_ids = tuple(set(ingredient_ids))
+        with self.lock:
+            for ingredient_id in self.recipes.pop(recipe_id, ()):
+                recipe_ids = self.postings[ingredient_id]
+                del recipe_ids[bisect_left(recipe_ids, recipe_id)]
+                if not recipe_ids:
+                    del self.postings[ingredient_id]
+            for ingredient_id in ingredient_ids:
+                insort(
+                    self.postings.setdefault(ingredient_id, array('l')),
+                    recipe_id,
+                )
+            if ingredient_ids:
+                self.recipes[recipe_id] = ingredient_ids
+
+    def match(self, ingredient_ids):
+        matched = Counter()
+        with self.lock:
+            for ingredient_id in set(ingredient_ids):
+                matched.update(self.postings.get(ingredient_id, ()))
+            sizes = {
+                recipe_id: len(self.recipes[recipe_id])
+                for recipe_id in matched
+            }
+        return MatchResults([
+            (recipe_id, count, sizes[recipe_id] - count)
+            for recipe_id, count in matched.items()
+        ])
+
+
+index = IngredientIndex()
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = time.time()
+        cache.set(VERSION_KEY, version, None)
+    return version
+
+
+def get_index():
+    version = get_version()
+    if index.version == version:
+        return index
+    if (index.built_at is None or time.monotonic() - index.built_at
+            >= settings.RECIPE_MATCHING_REFRESH_SECONDS):
+        index.build(IngredientInRecipe.objects.values_list(
+            'ingredient_id', 'recipe_id'
+        ).order_by('ingredient_id', 'recipe_id').iterator(chunk_size=10000))
+        index.version = version
+    return index
+
+
+def update_index(recipe_ids):
+    if index.built_at is None:
+        cache.set(VERSION_KEY, time.time(), None)
+        return
+    ingredients = {recipe_id: [] for recipe_id in recipe_ids}
+    for recipe_id, ingredient_id in IngredientInRecipe.objects.filter(
+        recipe_id__in=ingredients
+    ).values_list('recipe_id', 'ingredient_id'):
+        ingredients[recipe_id].append(ingredient_id)
+    up_to_date = index.version == get_version()
+    for recipe_id, ingredient_ids in ingredients.items():
+        index.set_recipe(recipe_id, ingredient_ids)
+    version = time.time()
+    cache.set(VERSION_KEY, version, None)
+    if up_to_date:
+        index.version = version
+
+
+def schedule_index_update(recipe_ids):
+    on_commit_batch(update_index, recipe_ids)
@@ -0,0 +1,285 @@
+import glob
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+HISTOGRAMS = {
+    'request_duration_seconds': (
+        'Время обработки запроса', DURATION_BUCKETS),
+    'db_queries': ('Количество SQL-запросов на запрос', QUERY_BUCKETS),
+    'db_duration_seconds': ('Время SQL-запросов на запрос', DURATION_BUCKETS),
+    'render_duration_seconds': (
+        'Время сериализации ответа в JSON/CSV/текст', DURATION_BUCKETS),
+    'response_size_bytes': ('Размер ответа', SIZE_BUCKETS),
+}
+METRIC_PREFIX = 'foodgram_'
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self.requests = defaultdict(int)
+        self.histograms = {
+            name: defaultdict(lambda buckets=buckets: Histogram(buckets))
+            for name, (help_text, buckets) in HISTOGRAMS.items()
+        }
+
+    def observe(self, route, method, status, values):
+        labels = (route, method)
+        with self.lock:
+            self.requests[labels + (str(status),)] += 1
+            for name, value in values.items():
+                if value is not None:
+                    self.histograms[name][labels].observe(value)
+
+    def dump(self):
+        return {
+            'requests': [
+                [*labels, count] for labels, count in self.requests.items()
+            ],
+            'histograms': {
+                name: [
+                    [*labels, histogram.counts, histogram.sum]
+                    for labels, histogram in histograms.items()
+                ]
+                for name, histograms in self.histograms.items()
+            },
+        }
+
+    def load(self, data):
+        for route, method, status, count in data['requests']:
+            self.requests[(route, method, status)] += count
+        for name, rows in data['histograms'].items():
+            if name not in self.histograms:
+                continue
+            for route, method, counts, total in rows:
+                histogram = self.histograms[name][(route, method)]
+                if len(counts) != len(histogram.counts):
+                    continue
+                histogram.counts = [
+                    old + new for old, new in zip(histogram.counts, counts)
+                ]
+                histogram.sum += total
+
+    def render(self):
+        lines = [
+            f'# HELP {METRIC_PREFIX}requests_total Количество запросов',
+            f'# TYPE {METRIC_PREFIX}requests_total counter',
+        ]
+        with self.lock:
+            for (route, method, status), count in sorted(
+                self.requests.items()
+            ):
+                lines.append(
+                    f'{METRIC_PREFIX}requests_total{{route="{route}",'
+                    f'method="{method}",status="{status}"}} {count}'
+                )
+            for name, (help_text, buckets) in HISTOGRAMS.items():
+                metric = METRIC_PREFIX + name
+                lines.append(f'# HELP {metric} {help_text}')
+                lines.append(f'# TYPE {metric} histogram')
+                for (route, method), histogram in sorted(
+                    self.histograms[name].items()
+                ):
+                    labels = f'route="{route}",method="{method}"'
+                    total = 0
+                    for bound, count in zip(
+                        buckets + ('+Inf',), histogram.counts
+                    ):
+                        total += count
+                        lines.append(
+                            f'{metric}_bucket{{{labels},le="{bound}"}} '
+                            f'{total}'
+                        )
+                    lines.append(f'{metric}_sum{{{labels}}} {histogram.sum}')
+                    lines.append(f'{metric}_count{{{labels}}} {total}')
+        return '\n'.join(lines) + '\n'
+
+
+class SharedRegistry(Registry):
+    def __init__(self):
+        super().__init__()
+        self.pid = None
+        self.flushed_at = 0
+
+    def get_path(self):
+        return os.path.join(settings.METRICS_DIR, f'{self.pid}.json')
+
+    def attach(self):
+        if self.pid == os.getpid():
+            return
+        self.clear()
+        self.pid = os.getpid()
+        self.flushed_at = 0
+        if settings.METRICS_DIR:
+            try:
+                with open(self.get_path()) as file:
+                    self.load(json.load(file))
+            except (OSError, ValueError):
+                pass
+
+    def observe(self, route, method, status, values):
+        with self.lock:
+            self.attach()
+        super().observe(route, method, status, values)
+        self.flush()
+
+    def flush(self, force=False):
+        if not settings.METRICS_DIR:
+            return
+        now = time.monotonic()
+        with self.lock:
+            self.attach()
+            if (not force and now - self.flushed_at
+                    < settings.METRICS_FLUSH_SECONDS):
+                return
+            self.flushed_at = now
+            os.makedirs(settings.METRICS_DIR, exist_ok=True)
+            path = self.get_path()
+            with open(f'{path}.tmp', 'w') as file:
+                json.dump(self.dump(), file)
+            os.replace(f'{path}.tmp', path)
+
+    def collect(self):
+        if not settings.METRICS_DIR:
+            return self
+        self.flush(force=True)
+        collected = Registry()
+        for path in glob.glob(os.path.join(settings.METRICS_DIR, '*.json')):
+            try:
+                with open(path) as file:
+                    collected.load(json.load(file))
+            except (OSError, ValueError):
+                continue
+        return collected
+
+
+registry = SharedRegistry()
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.queries = []
+        self.duration = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.duration += duration
+            self.queries.append((sql, duration))
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        request.render_duration = None
+        started = time.perf_counter()
+        with self.record_queries(recorder):
+            response = self.get_response(request)
+        if response.streaming:
+            response.streaming_content = self.stream(
+                request, response, response.streaming_content, recorder,
+                started,
+            )
+        else:
+            self.observe(request, response, recorder, started,
+                         len(response.content))
+        return response
+
+    def record_queries(self, recorder):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        return stack
+
+    def stream(self, request, response, content, recorder, started):
+        size = 0
+        try:
+            with self.record_queries(recorder):
+                for chunk in content:
+                    size += len(chunk)
+                    yield chunk
+        finally:
+            self.observe(request, response, recorder, started, size)
+
+    def observe(self, request, response, recorder, started, size):
+        duration = time.perf_counter() - started
+        match = request.resolver_match
+        route = (match.url_name or match.view_name) if match else 'unmatched'
+        registry.observe(route, request.method, response.status_code, {
+            'request_duration_seconds': duration,
+            'db_queries': len(recorder.queries),
+            'db_duration_seconds': recorder.duration,
+            'render_duration_seconds': request.render_duration,
+            'response_size_bytes': size,
+        })
+        if (duration > settings.METRICS_SLOW_REQUEST_SECONDS
+                or len(recorder.queries) > settings.METRICS_QUERY_BUDGET):
+            logger.warning(
+                '%s %s (%s): %.3f с, SQL-запросов: %s, %.3f с\n%s',
+                request.method, request.get_full_path(), route, duration,
+                len(recorder.queries), recorder.duration,
+                '\n'.join(f'{query_duration:.4f} {sql}'
+                          for sql, query_duration in recorder.queries),
+            )
+
+    def process_template_response(self, request, response):
+        started = time.perf_counter()
+
+        def record_render_duration(response):
+            request.render_duration = time.perf_counter() - started
+
+        response.add_post_render_callback(record_render_duration)
+        return response
+
+
+def is_metrics_allowed(request):
+    if request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS:
+        return True
+    token = settings.METRICS_TOKEN
+    return bool(token) and hmac.compare_digest(
+        request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'
+    )
+
+
+def metrics(request):
+    if not is_metrics_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        registry.collect().render(), content_type='text/plain; version=0.0.4'
+    )
@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            'ALTER TABLE recipes_recipe ADD COLUMN search_vector tsvector'
+        )
+        schema_editor.execute(
+            '''
+            UPDATE recipes_recipe SET search_vector =
+                setweight(to_tsvector(%(config)s, name), 'A')
+                || setweight(to_tsvector(%(config)s, coalesce((
+                    SELECT string_agg(i.name, ' ')
+                    FROM recipes_ingredientinrecipe ir
+                    JOIN recipes_ingredient i ON i.id = ir.ingredient_id
+                    WHERE ir.recipe_id = recipes_recipe.id
+                ), '')), 'B')
+                || setweight(to_tsvector(%(config)s, text), 'C')
+            ''',
+            {'config': settings.RECIPE_SEARCH_CONFIG},
+        )
+        schema_editor.execute(
+            'CREATE INDEX recipe_search_vector_idx '
+            'ON recipes_recipe USING gin (search_vector)'
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            'CREATE VIRTUAL TABLE recipes_recipe_search USING fts5('
+            'name, ingredients, text, '
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            '''
+            INSERT INTO recipes_recipe_search (rowid, name, ingredients, text)
+            SELECT r.id, r.name, coalesce(group_concat(i.name, ' '), ''),
+                   r.text
+            FROM recipes_recipe r
+            LEFT JOIN recipes_ingredientinrecipe ir ON ir.recipe_id = r.id
+            LEFT JOIN recipes_ingredient i ON i.id = ir.ingredient_id
+            GROUP BY r.id
+            '''
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            'ALTER TABLE recipes_recipe DROP COLUMN search_vector'
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE recipes_recipe_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_timelineentry'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
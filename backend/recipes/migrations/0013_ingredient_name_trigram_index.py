@@ -0,0 +1,67 @@
+from django.db import migrations
+
+SQLITE_TABLE = 'recipes_ingredient_trigram'
+
+
+def create_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS recipes_ingredient_name_lower_trgm '
+            'ON recipes_ingredient USING gin (lower(name) gin_trgm_ops)'
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE {SQLITE_TABLE} USING fts5('
+            "name, content = 'recipes_ingredient', content_rowid = 'id', "
+            "tokenize = 'trigram')"
+        )
+        schema_editor.execute(
+            f'CREATE TRIGGER {SQLITE_TABLE}_insert '
+            'AFTER INSERT ON recipes_ingredient BEGIN '
+            f'INSERT INTO {SQLITE_TABLE} (rowid, name) '
+            'VALUES (new.id, new.name); END'
+        )
+        schema_editor.execute(
+            f'CREATE TRIGGER {SQLITE_TABLE}_delete '
+            'AFTER DELETE ON recipes_ingredient BEGIN '
+            f'INSERT INTO {SQLITE_TABLE} ({SQLITE_TABLE}, rowid, name) '
+            "VALUES ('delete', old.id, old.name); END"
+        )
+        schema_editor.execute(
+            f'CREATE TRIGGER {SQLITE_TABLE}_update '
+            'AFTER UPDATE OF name ON recipes_ingredient BEGIN '
+            f'INSERT INTO {SQLITE_TABLE} ({SQLITE_TABLE}, rowid, name) '
+            "VALUES ('delete', old.id, old.name); "
+            f'INSERT INTO {SQLITE_TABLE} (rowid, name) '
+            'VALUES (new.id, new.name); END'
+        )
+        schema_editor.execute(
+            f"INSERT INTO {SQLITE_TABLE} ({SQLITE_TABLE}) VALUES ('rebuild')"
+        )
+
+
+def drop_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            'DROP INDEX IF EXISTS recipes_ingredient_name_lower_trgm'
+        )
+    elif vendor == 'sqlite':
+        for action in ('insert', 'delete', 'update'):
+            schema_editor.execute(
+                f'DROP TRIGGER IF EXISTS {SQLITE_TABLE}_{action}'
+            )
+        schema_editor.execute(f'DROP TABLE IF EXISTS {SQLITE_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_timeline_pub_date_recipe_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -1,8 +1,49 @@
+import heapq
+from itertools import islice
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator
-from django.db import models
+from django.db import connections, models, router, transaction
+from django.db.models import (Case, Count, Exists, F, OuterRef, Prefetch,
+                              Subquery, Value, When)
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce, Lower
+
+from foodgram.mixins import CounterFieldsMixin
+
+from .cache import bump_versions
+
 User = get_user_model()
 
+INGREDIENT_SUBSTRING_MIN_LENGTH = 3
+INGREDIENT_TRIGRAM_TABLE = 'recipes_ingredient_trigram'
+
+
+class IngredientQuerySet(models.QuerySet):
+    def filter_name_contains(self, name):
+        connection = connections[self.db]
+        if connection.vendor == 'sqlite':
+            return self.filter(pk__in=RawSQL(
+                f'SELECT rowid FROM {INGREDIENT_TRIGRAM_TABLE} '
+                f'WHERE {INGREDIENT_TRIGRAM_TABLE} MATCH %s',
+                ['"{}"'.format(name.replace('"', '""'))],
+            ))
+        return self.filter(lower_name__contains=name)
+
+    def autocomplete(self, name, limit):
+        name = name.strip().lower()
+        queryset = self.annotate(lower_name=Lower('name'))
+        ingredients = list(
+            queryset.filter(lower_name__startswith=name)[:limit]
+        )
+        if (len(ingredients) < limit
+                and len(name) >= INGREDIENT_SUBSTRING_MIN_LENGTH):
+            ingredients += queryset.filter_name_contains(name).exclude(
+                lower_name__startswith=name
+            )[:limit - len(ingredients)]
+        return ingredients
+
 
 class Ingredient(models.Model):
     name = models.CharField(
@@ -14,6 +55,8 @@ class Ingredient(models.Model):
         max_length=100
     )
 
+    objects = IngredientQuerySet.as_manager()
+
     class Meta:
         ordering = ('name',)
         verbose_name = 'Ингредиент'
@@ -50,7 +93,89 @@ class Tag(models.Model):
         return self.name
 
 
-class Recipe(models.Model):
+class RecipeQuerySet(models.QuerySet):
+    def with_related(self, user):
+        authors = User.objects.all()
+        if not user.is_anonymous:
+            authors = authors.annotate(is_subscribed=Exists(
+                Follow.objects.filter(user=user, author=OuterRef('pk'))
+            ))
+        return self.prefetch_related(
+            Prefetch('author', queryset=authors),
+            'tags',
+            Prefetch(
+                'ingredients_amounts',
+                queryset=IngredientInRecipe.objects.select_related(
+                    'ingredient'
+                )
+            ),
+        )
+
+    def feed(self, user):
+        return RecipeFeed(self, user)
+
+    def in_feed(self, user):
+        return self.filter(
+            models.Q(pk__in=TimelineEntry.objects.filter(
+                user=user
+            ).values('recipe'))
+            | models.Q(author__in=Follow.objects.filter(
+                user=user,
+                author__followers_count__gt=settings.FEED_FANOUT_MAX_FOLLOWERS,
+            ).values('author'))
+        )
+
+    def with_user_flags(self, user):
+        if user.is_anonymous:
+            return self.annotate(
+                is_favorited=Value(False, models.BooleanField()),
+                is_in_shopping_cart=Value(False, models.BooleanField()),
+            )
+        return self.annotate(
+            is_favorited=Exists(Favorites.objects.filter(
+                user=user, recipe_id=OuterRef('pk')
+            )),
+            is_in_shopping_cart=Exists(Purchase.objects.filter(
+                user=user, recipe_id=OuterRef('pk')
+            ))
+        )
+
+
+class RecipeFeed:
+    def __init__(self, queryset, user):
+        self.queryset = queryset
+        self.entries = TimelineEntry.objects.filter(user=user).order_by(
+            '-pub_date', '-recipe_id'
+        ).values_list('pub_date', 'recipe_id')
+        self.pulled = Recipe.objects.filter(author__in=Follow.objects.filter(
+            user=user,
+            author__followers_count__gt=settings.FEED_FANOUT_MAX_FOLLOWERS,
+        ).values('author')).order_by('-pub_date', '-id').values_list(
+            'pub_date', 'id'
+        )
+
+    def count(self):
+        return self.entries.count() + self.pulled.count()
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice) or index.step is not None:
+            raise TypeError('Лента поддерживает только срезы без шага')
+        start, stop = index.start or 0, index.stop
+        ids = [
+            recipe_id for pub_date, recipe_id in islice(
+                heapq.merge(self.entries[:stop], self.pulled[:stop],
+                            reverse=True),
+                start, stop,
+            )
+        ]
+        recipes = self.queryset.in_bulk(ids)
+        return [recipes[pk] for pk in ids if pk in recipes]
+
+
+class Recipe(CounterFieldsMixin, models.Model):
     author = models.ForeignKey(
         User,
         verbose_name='Автор',
@@ -65,6 +190,12 @@ class Recipe(models.Model):
         verbose_name='Изображение',
         upload_to='recipes/',
     )
+    image_variants = models.JSONField(
+        verbose_name='Уменьшенные изображения',
+        default=dict,
+        blank=True,
+        editable=False,
+    )
     text = models.TextField(
         verbose_name='Описание'
     )
@@ -76,6 +207,21 @@ class Recipe(models.Model):
         auto_now_add=True,
         verbose_name='Дата публикации'
     )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='В избранном',
+        default=0,
+        editable=False,
+    )
+    purchases_count = models.PositiveIntegerField(
+        verbose_name='В списках покупок',
+        default=0,
+        editable=False,
+    )
+    trending_score = models.FloatField(
+        verbose_name='Рейтинг популярности',
+        default=0,
+        editable=False,
+    )
     ingredients = models.ManyToManyField(
         Ingredient,
         through='IngredientInRecipe',
@@ -87,10 +233,26 @@ class Recipe(models.Model):
         verbose_name='Теги',
     )
 
+    objects = RecipeQuerySet.as_manager()
+
+    counter_fields = ('favorites_count', 'purchases_count', 'trending_score')
+
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = [
+            models.Index(fields=['-pub_date', '-id'],
+                         name='recipe_pub_date_id_idx'),
+            models.Index(fields=['author', '-pub_date'],
+                         name='recipe_author_pub_date_idx'),
+            models.Index(fields=['-favorites_count', '-id'],
+                         name='recipe_popular_idx'),
+            models.Index(fields=['-trending_score', '-id'],
+                         name='recipe_trending_idx'),
+            models.Index(fields=['cooking_time', 'id'],
+                         name='recipe_cooking_time_idx'),
+        ]
 
     def __str__(self) -> str:
         return self.name
@@ -127,6 +289,143 @@ class IngredientInRecipe(models.Model):
         return (f'В рецепте {self.recipe.name}: '
                 f'{self.ingredient.name} {self.amount}')
 
+    def save(self, *args, **kwargs):
+        old = None
+        if self.pk is not None:
+            old = type(self).objects.filter(pk=self.pk).values_list(
+                'recipe_id', 'ingredient_id', 'amount'
+            ).first()
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            old_amounts = {}
+            if old is not None:
+                recipe_id, ingredient_id, amount = old
+                if recipe_id == self.recipe_id:
+                    old_amounts = {ingredient_id: amount}
+                else:
+                    ShoppingCartIngredient.objects.update_recipe(
+                        recipe_id, {ingredient_id: amount}, {}
+                    )
+            ShoppingCartIngredient.objects.update_recipe(
+                self.recipe_id, old_amounts, {self.ingredient_id: self.amount}
+            )
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            ShoppingCartIngredient.objects.update_recipe(
+                self.recipe_id, {self.ingredient_id: self.amount}, {}
+            )
+            return super().delete(*args, **kwargs)
+
+
+def insert_returning(objs, column):
+    """INSERT ... ON CONFLICT DO NOTHING RETURNING column.
+
+    bulk_create(ignore_conflicts=True) не сообщает, какие строки вставлены,
+    поэтому запрос собирается вручную; сигналы post_save не отправляются.
+    """
+    if not objs:
+        return []
+    model = type(objs[0])
+    connection = connections[router.db_for_write(model)]
+    quote = connection.ops.quote_name
+    fields = [
+        field for field in model._meta.concrete_fields
+        if not field.primary_key
+    ]
+    row = '({})'.format(', '.join(['%s'] * len(fields)))
+    params = [
+        field.get_db_prep_save(field.pre_save(obj, True), connection)
+        for obj in objs for field in fields
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'INSERT INTO {} ({}) VALUES {} ON CONFLICT DO NOTHING '
+            'RETURNING {}'.format(
+                quote(model._meta.db_table),
+                ', '.join(quote(field.column) for field in fields),
+                ', '.join([row] * len(objs)),
+                quote(column),
+            ),
+            params,
+        )
+        return [value for value, in cursor.fetchall()]
+
+
+def delete_returning(queryset, column):
+    """DELETE ... RETURNING column для строк queryset.
+
+    Удаляет одним запросом без сигналов pre_delete/post_delete и
+    возвращает значения column удалённых строк.
+    """
+    model = queryset.model
+    using = router.db_for_write(model)
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    sql, params = queryset.values('pk').query.get_compiler(using).as_sql()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'DELETE FROM {table} WHERE {pk} IN ({sql}) RETURNING {column}'
+            .format(
+                table=quote(model._meta.db_table),
+                pk=quote(model._meta.pk.column),
+                sql=sql,
+                column=quote(column),
+            ),
+            params,
+        )
+        return [value for value, in cursor.fetchall()]
+
+
+class UserRecipeQuerySet(models.QuerySet):
+    counter = None
+
+    def update_counters(self, recipe_ids, delta):
+        if recipe_ids:
+            Recipe.objects.filter(pk__in=recipe_ids).update(**{
+                self.counter: F(self.counter) + delta,
+            })
+
+    def recipes_added(self, user_id, recipe_ids):
+        self.update_counters(recipe_ids, 1)
+
+    def recipes_removed(self, user_id, recipe_ids):
+        self.update_counters(recipe_ids, -1)
+
+    def add_recipe(self, user_id, recipe_id):
+        return bool(self.add_recipes(user_id, [recipe_id]))
+
+    def remove_recipe(self, user_id, recipe_id):
+        return bool(self.remove_recipes(user_id, [recipe_id]))
+
+    def add_recipes(self, user_id, recipe_ids):
+        with transaction.atomic():
+            created = insert_returning(
+                [self.model(user_id=user_id, recipe_id=recipe_id)
+                 for recipe_id in recipe_ids],
+                'recipe_id',
+            )
+            self.recipes_added(user_id, created)
+        return created
+
+    def remove_recipes(self, user_id, recipe_ids):
+        with transaction.atomic():
+            deleted = delete_returning(
+                self.filter(user_id=user_id, recipe_id__in=recipe_ids),
+                'recipe_id',
+            )
+            self.recipes_removed(user_id, deleted)
+        return deleted
+
+
+class FavoritesQuerySet(UserRecipeQuerySet):
+    counter = 'favorites_count'
+
+    def update_counters(self, recipe_ids, delta):
+        super().update_counters(recipe_ids, delta)
+        if recipe_ids:
+            bump_versions('recipe-counters')
+
 
 class Favorites(models.Model):
     user = models.ForeignKey(
@@ -144,6 +443,8 @@ class Favorites(models.Model):
         verbose_name='Дата добавления',
     )
 
+    objects = FavoritesQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Избранное'
         verbose_name_plural = 'Избранное'
@@ -152,11 +453,75 @@ class Favorites(models.Model):
                 fields=['user', 'recipe'], name='favorite_user_recept_unique'
             )
         ]
+        indexes = [
+            models.Index(fields=['recipe', 'user'],
+                         name='favorite_recipe_user_idx'),
+            models.Index(fields=['date_added'],
+                         name='favorite_date_added_idx'),
+        ]
 
     def __str__(self):
         return f'Рецепт {self.recipe.name} в избранном у {self.user.username}'
 
 
+class FollowQuerySet(models.QuerySet):
+    def with_author_recipes(self, recipes_limit=None):
+        recipes = Recipe.objects.all()
+        if recipes_limit is not None:
+            recipes = recipes.filter(pk__in=Subquery(
+                Recipe.objects.filter(
+                    author=OuterRef('author')
+                ).values('pk')[:recipes_limit]
+            ))
+        return self.select_related('author').annotate(
+            is_subscribed=Value(True, models.BooleanField()),
+        ).prefetch_related(
+            Prefetch('author__recipes', queryset=recipes,
+                     to_attr='limited_recipes')
+        )
+
+    def update_counters(self, author_ids, delta):
+        if author_ids:
+            User.objects.filter(pk__in=author_ids).update(
+                followers_count=F('followers_count') + delta,
+            )
+
+    def authors_added(self, user_id, author_ids):
+        self.update_counters(author_ids, 1)
+        TimelineEntry.objects.update_fan_out(author_ids, 1)
+        TimelineEntry.objects.add_authors(user_id, author_ids)
+
+    def authors_removed(self, user_id, author_ids):
+        self.update_counters(author_ids, -1)
+        TimelineEntry.objects.update_fan_out(author_ids, -1)
+        TimelineEntry.objects.remove_authors(user_id, author_ids)
+
+    def add_author(self, user_id, author_id):
+        return bool(self.add_authors(user_id, [author_id]))
+
+    def remove_author(self, user_id, author_id):
+        return bool(self.remove_authors(user_id, [author_id]))
+
+    def add_authors(self, user_id, author_ids):
+        with transaction.atomic():
+            created = insert_returning(
+                [self.model(user_id=user_id, author_id=author_id)
+                 for author_id in author_ids],
+                'author_id',
+            )
+            self.authors_added(user_id, created)
+        return created
+
+    def remove_authors(self, user_id, author_ids):
+        with transaction.atomic():
+            deleted = delete_returning(
+                self.filter(user_id=user_id, author_id__in=author_ids),
+                'author_id',
+            )
+            self.authors_removed(user_id, deleted)
+        return deleted
+
+
 class Follow(models.Model):
     user = models.ForeignKey(
         User,
@@ -173,6 +538,8 @@ class Follow(models.Model):
         verbose_name='Дата подписки',
     )
 
+    objects = FollowQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Подписка'
         verbose_name_plural = 'Подписки'
@@ -181,11 +548,27 @@ class Follow(models.Model):
                 fields=['user', 'author'], name='follow_unique'
             )
         ]
+        indexes = [
+            models.Index(fields=['author', 'user'],
+                         name='follow_author_user_idx'),
+        ]
 
     def __str__(self):
         return f'{self.user.username} подписан на {self.author.username}'
 
 
+class PurchaseQuerySet(UserRecipeQuerySet):
+    counter = 'purchases_count'
+
+    def recipes_added(self, user_id, recipe_ids):
+        super().recipes_added(user_id, recipe_ids)
+        ShoppingCartIngredient.objects.add_recipes(user_id, recipe_ids)
+
+    def recipes_removed(self, user_id, recipe_ids):
+        super().recipes_removed(user_id, recipe_ids)
+        ShoppingCartIngredient.objects.remove_recipes(user_id, recipe_ids)
+
+
 class Purchase(models.Model):
     user = models.ForeignKey(
         User,
@@ -202,6 +585,8 @@ class Purchase(models.Model):
         verbose_name='Дата добавления',
     )
 
+    objects = PurchaseQuerySet.as_manager()
+
     class Meta:
         ordering = ('-date_added',)
         verbose_name = 'Покупка'
@@ -211,7 +596,285 @@ class Purchase(models.Model):
                 fields=['user', 'recipe'], name='purchase_user_recipe_unique'
             )
         ]
+        indexes = [
+            models.Index(fields=['user', '-date_added'],
+                         name='purchase_user_date_idx'),
+            models.Index(fields=['date_added'],
+                         name='purchase_date_added_idx'),
+        ]
 
     def __str__(self):
         return (f'Рецепт {self.recipe.name} '
                 f'в списке покупок {self.user.username}')
+
+
+def shift_counter(model, pk, field, delta):
+    model.objects.filter(pk=pk).update(**{field: F(field) + delta})
+
+
+def count_related(model, field):
+    return Coalesce(Subquery(
+        model.objects.filter(
+            **{field: OuterRef('pk')}
+        ).order_by().values(field).annotate(
+            total=Count('pk')
+        ).values('total'),
+        output_field=models.PositiveIntegerField(),
+    ), 0)
+
+
+def recompute_counters():
+    with transaction.atomic():
+        recipes = Recipe.objects.update(
+            favorites_count=count_related(Favorites, 'recipe'),
+            purchases_count=count_related(Purchase, 'recipe'),
+        )
+        users = User.objects.update(
+            recipes_count=count_related(Recipe, 'author'),
+            followers_count=count_related(Follow, 'author'),
+        )
+    return recipes, users
+
+
+def get_ingredient_amounts(recipe_id):
+    return dict(IngredientInRecipe.objects.filter(
+        recipe_id=recipe_id
+    ).values_list('ingredient_id', 'amount'))
+
+
+def get_ingredient_totals(recipe_ids):
+    return dict(IngredientInRecipe.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values('ingredient_id').annotate(
+        total=models.Sum('amount')
+    ).values_list('ingredient_id', 'total').order_by())
+
+
+class ShoppingCartIngredientQuerySet(models.QuerySet):
+    def add_amounts(self, user_ids, amounts):
+        amounts = {
+            ingredient_id: amount
+            for ingredient_id, amount in amounts.items() if amount
+        }
+        if not user_ids or not amounts:
+            return
+        with transaction.atomic():
+            self.bulk_create(
+                [
+                    self.model(user_id=user_id, ingredient_id=ingredient_id,
+                               amount=0)
+                    for user_id in user_ids
+                    for ingredient_id, amount in amounts.items()
+                    if amount > 0
+                ],
+                ignore_conflicts=True,
+            )
+            self.filter(
+                user_id__in=user_ids, ingredient_id__in=amounts
+            ).update(amount=F('amount') + Case(
+                *[When(ingredient_id=ingredient_id, then=Value(amount))
+                  for ingredient_id, amount in amounts.items()],
+                default=Value(0),
+                output_field=models.IntegerField(),
+            ))
+            self.filter(user_id__in=user_ids, amount__lte=0).delete()
+
+    def add_recipes(self, user_id, recipe_ids):
+        if recipe_ids:
+            self.add_amounts([user_id], get_ingredient_totals(recipe_ids))
+
+    def remove_recipes(self, user_id, recipe_ids):
+        if recipe_ids:
+            self.add_amounts([user_id], {
+                ingredient_id: -amount
+                for ingredient_id, amount
+                in get_ingredient_totals(recipe_ids).items()
+            })
+
+    def rebuild(self):
+        amounts = IngredientInRecipe.objects.filter(
+            recipe__customers__isnull=False
+        ).values(
+            'recipe__customers__user', 'ingredient'
+        ).annotate(total=models.Sum('amount')).order_by()
+        with transaction.atomic():
+            self.all().delete()
+            self.bulk_create(
+                (self.model(user_id=row['recipe__customers__user'],
+                            ingredient_id=row['ingredient'],
+                            amount=row['total'])
+                 for row in amounts.iterator()),
+                batch_size=1000,
+            )
+
+    def update_recipe(self, recipe_id, old_amounts, new_amounts=None):
+        if new_amounts is None:
+            new_amounts = get_ingredient_amounts(recipe_id)
+        user_ids = list(Purchase.objects.filter(
+            recipe_id=recipe_id
+        ).values_list('user_id', flat=True))
+        self.add_amounts(user_ids, {
+            ingredient_id: (new_amounts.get(ingredient_id, 0)
+                            - old_amounts.get(ingredient_id, 0))
+            for ingredient_id in new_amounts.keys() | old_amounts.keys()
+        })
+
+
+class ShoppingCartIngredient(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_cart_ingredients',
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='shopping_cart_ingredients',
+        verbose_name='Ингредиент',
+    )
+    amount = models.IntegerField(
+        verbose_name='Количество ингредиента',
+    )
+
+    objects = ShoppingCartIngredientQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Ингредиент в списке покупок'
+        verbose_name_plural = 'Ингредиенты в списке покупок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='shopping_cart_user_ingredient_unique'
+            )
+        ]
+
+    def __str__(self):
+        return (f'{self.ingredient.name} {self.amount} '
+                f'в списке покупок {self.user.username}')
+
+
+class TimelineEntryQuerySet(models.QuerySet):
+    def is_fan_out_author(self, author_id):
+        return User.objects.filter(
+            pk=author_id,
+            followers_count__lte=settings.FEED_FANOUT_MAX_FOLLOWERS,
+        ).exists()
+
+    def fan_out(self, recipe):
+        if not self.is_fan_out_author(recipe.author_id):
+            return
+        follower_ids = Follow.objects.filter(
+            author_id=recipe.author_id
+        ).values_list('user_id', flat=True)
+        self.bulk_create(
+            (self.model(user_id=user_id, recipe_id=recipe.id,
+                        author_id=recipe.author_id, pub_date=recipe.pub_date)
+             for user_id in follower_ids.iterator()),
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+
+    def update_fan_out(self, author_ids, delta):
+        limit = settings.FEED_FANOUT_MAX_FOLLOWERS
+        crossed = list(User.objects.filter(
+            pk__in=author_ids,
+            followers_count=limit + 1 if delta > 0 else limit,
+        ).values_list('pk', flat=True))
+        if not crossed:
+            return
+        if delta > 0:
+            self.filter(author_id__in=crossed).delete()
+            return
+        rows = Follow.objects.filter(
+            author_id__in=crossed, author__recipes__isnull=False,
+        ).values_list(
+            'user_id', 'author_id', 'author__recipes__id',
+            'author__recipes__pub_date',
+        ).order_by()
+        self.bulk_create(
+            (self.model(user_id=user_id, author_id=author_id,
+                        recipe_id=recipe_id, pub_date=pub_date)
+             for user_id, author_id, recipe_id, pub_date in rows.iterator()),
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+
+    def add_authors(self, user_id, author_ids):
+        if not author_ids:
+            return
+        recipes = Recipe.objects.filter(
+            author_id__in=author_ids,
+            author__followers_count__lte=settings.FEED_FANOUT_MAX_FOLLOWERS,
+        ).values_list('id', 'author_id', 'pub_date')
+        self.bulk_create(
+            (self.model(user_id=user_id, recipe_id=recipe_id,
+                        author_id=author_id, pub_date=pub_date)
+             for recipe_id, author_id, pub_date in recipes.iterator()),
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+
+    def remove_authors(self, user_id, author_ids):
+        if author_ids:
+            self.filter(user_id=user_id, author_id__in=author_ids).delete()
+
+    def rebuild(self):
+        rows = Follow.objects.filter(
+            author__followers_count__lte=settings.FEED_FANOUT_MAX_FOLLOWERS,
+            author__recipes__isnull=False,
+        ).values_list(
+            'user_id', 'author_id', 'author__recipes__id',
+            'author__recipes__pub_date',
+        ).order_by()
+        with transaction.atomic():
+            self.all().delete()
+            self.bulk_create(
+                (self.model(user_id=user_id, author_id=author_id,
+                            recipe_id=recipe_id, pub_date=pub_date)
+                 for user_id, author_id, recipe_id, pub_date
+                 in rows.iterator()),
+                batch_size=1000,
+            )
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации',
+    )
+
+    objects = TimelineEntryQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'], name='timeline_user_recipe_unique'
+            )
+        ]
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-recipe'],
+                         name='timeline_user_pub_date_idx'),
+            models.Index(fields=['user', 'author'],
+                         name='timeline_user_author_idx'),
+            models.Index(fields=['author'],
+                         name='timeline_author_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.recipe.name} в ленте {self.user.username}'
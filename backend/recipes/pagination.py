@@ -1,5 +1,109 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 
 class CustomPagination(PageNumberPagination):
     page_size_query_param = 'limit'
+
+
+class KeysetCursorPagination(CursorPagination):
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for field in ordering:
+            field = field.lstrip('-')
+            if isinstance(instance, dict):
+                values.append(str(instance[field]))
+            else:
+                values.append(str(getattr(instance, field)))
+        return json.dumps(values)
+
+    def get_position_filter(self, ordering, position):
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+        conditions = []
+        for index, field in enumerate(ordering):
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            conditions.append(Q(**{
+                previous.lstrip('-'): value
+                for previous, value in zip(ordering[:index], values)
+            }, **{f'{field.lstrip("-")}__{lookup}': values[index]}))
+        return reduce(or_, conditions)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        offset, reverse, current_position = self.cursor or (0, False, None)
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(
+                field[1:] if field.startswith('-') else f'-{field}'
+                for field in ordering
+            )
+        queryset = queryset.order_by(*ordering)
+        if current_position is not None:
+            queryset = queryset.filter(
+                self.get_position_filter(ordering, current_position)
+            )
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = results[:self.page_size]
+        following_position = None
+        if len(results) > len(self.page):
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering
+            )
+        has_position = current_position is not None or offset > 0
+        if reverse:
+            self.page.reverse()
+            self.has_next = has_position
+            self.has_previous = following_position is not None
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next = following_position is not None
+            self.has_previous = has_position
+            self.next_position = following_position
+            self.previous_position = current_position
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+
+class RecipeCursorPagination(KeysetCursorPagination):
+    ordering = ('-pub_date', '-id')
+    page_size_query_param = 'limit'
+
+
+class LatestCursorPagination(CursorPagination):
+    ordering = '-id'
+    page_size_query_param = 'limit'
+
+
+class CursorPaginationMixin:
+    cursor_pagination_class = None
+    cursor_pagination_param = 'pagination'
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            pagination_class = self.pagination_class
+            if (self.cursor_pagination_class is not None
+                    and self.request.query_params.get(
+                        self.cursor_pagination_param) == 'cursor'):
+                pagination_class = self.cursor_pagination_class
+            self._paginator = (
+                pagination_class() if pagination_class is not None else None
+            )
+        return self._paginator
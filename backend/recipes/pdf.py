@@ -0,0 +1,262 @@
+import struct
+import zlib
+from functools import lru_cache
+
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+MARGIN = 50
+FONT_SIZE = 11
+TITLE_SIZE = 16
+LEADING = 16
+CATALOG_ID = 1
+PAGES_ID = 2
+FONT_ID = 3
+CID_FONT_ID = 4
+DESCRIPTOR_ID = 5
+FONT_FILE_ID = 6
+TO_UNICODE_ID = 7
+CMAP_BLOCK_SIZE = 100
+
+
+class TrueTypeFont:
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            self.data = file.read()
+        tables = {}
+        count = struct.unpack_from('>H', self.data, 4)[0]
+        for index in range(count):
+            tag, checksum, offset, length = struct.unpack_from(
+                '>4sIII', self.data, 12 + 16 * index
+            )
+            tables[tag.decode('latin-1')] = offset
+        self.units_per_em = struct.unpack_from(
+            '>H', self.data, tables['head'] + 18
+        )[0]
+        self.bbox = struct.unpack_from('>4h', self.data, tables['head'] + 36)
+        self.ascent, self.descent = struct.unpack_from(
+            '>2h', self.data, tables['hhea'] + 4
+        )
+        metrics_count = struct.unpack_from(
+            '>H', self.data, tables['hhea'] + 34
+        )[0]
+        self.advances = struct.unpack_from(
+            f'>{metrics_count * 2}H', self.data, tables['hmtx']
+        )[::2]
+        self.glyphs = self.read_cmap(tables['cmap'])
+        self.compressed = zlib.compress(self.data)
+
+    def read_cmap(self, table):
+        count = struct.unpack_from('>H', self.data, table + 2)[0]
+        for index in range(count):
+            platform, encoding, offset = struct.unpack_from(
+                '>HHI', self.data, table + 4 + 8 * index
+            )
+            offset += table
+            if ((platform, encoding) in ((3, 1), (0, 3), (0, 4))
+                    and struct.unpack_from('>H', self.data, offset)[0] == 4):
+                return self.read_cmap_format_4(offset)
+        raise ValueError('В шрифте нет таблицы cmap формата 4.')
+
+    def read_cmap_format_4(self, offset):
+        size = struct.unpack_from('>H', self.data, offset + 6)[0]
+        segments = size // 2
+        ends = struct.unpack_from(f'>{segments}H', self.data, offset + 14)
+        starts = struct.unpack_from(
+            f'>{segments}H', self.data, offset + 16 + size
+        )
+        deltas = struct.unpack_from(
+            f'>{segments}h', self.data, offset + 16 + 2 * size
+        )
+        range_offsets_at = offset + 16 + 3 * size
+        range_offsets = struct.unpack_from(
+            f'>{segments}H', self.data, range_offsets_at
+        )
+        glyphs = {}
+        for index in range(segments):
+            for code in range(starts[index], ends[index] + 1):
+                if code == 0xFFFF:
+                    continue
+                if range_offsets[index]:
+                    glyph = struct.unpack_from(
+                        '>H', self.data,
+                        range_offsets_at + 2 * index + range_offsets[index]
+                        + 2 * (code - starts[index]),
+                    )[0]
+                    if glyph:
+                        glyph = (glyph + deltas[index]) & 0xFFFF
+                else:
+                    glyph = (code + deltas[index]) & 0xFFFF
+                if glyph:
+                    glyphs[code] = glyph
+        return glyphs
+
+    def get_glyph(self, char):
+        return self.glyphs.get(ord(char), 0)
+
+    def get_advance(self, glyph):
+        return self.advances[min(glyph, len(self.advances) - 1)]
+
+    def get_width(self, text, size):
+        return sum(
+            self.get_advance(self.get_glyph(char)) for char in text
+        ) * size / self.units_per_em
+
+
+@lru_cache(maxsize=None)
+def get_font(path):
+    return TrueTypeFont(path)
+
+
+def wrap(font, text, size, width):
+    line = ''
+    for word in text.split(' '):
+        candidate = f'{line} {word}' if line else word
+        if line and font.get_width(candidate, size) > width:
+            yield line
+            line = word
+        else:
+            line = candidate
+    yield line
+
+
+class PDFWriter:
+    def __init__(self, font_path):
+        self.font = get_font(font_path)
+        self.offsets = {}
+        self.position = 0
+        self.page_ids = []
+        self.used = {}
+        self.next_id = TO_UNICODE_ID + 1
+
+    def write(self, data):
+        self.position += len(data)
+        return data
+
+    def write_object(self, number, body, stream=None):
+        self.offsets[number] = self.position
+        data = f'{number} 0 obj\n'.encode() + body
+        if stream is not None:
+            data += b'\nstream\n' + stream + b'\nendstream'
+        return self.write(data + b'\nendobj\n')
+
+    def encode(self, text):
+        glyphs = []
+        for char in text:
+            glyph = self.font.get_glyph(char)
+            self.used.setdefault(glyph, char)
+            glyphs.append(glyph)
+        return ''.join(f'{glyph:04X}' for glyph in glyphs)
+
+    def write_page(self, lines):
+        content = []
+        y = PAGE_HEIGHT - MARGIN
+        for text, size in lines:
+            y -= size + (LEADING - FONT_SIZE)
+            content.append(
+                f'BT /F1 {size} Tf {MARGIN} {y} Td <{self.encode(text)}> Tj ET'
+            )
+        stream = zlib.compress('\n'.join(content).encode())
+        page_id, content_id = self.next_id, self.next_id + 1
+        self.next_id += 2
+        self.page_ids.append(page_id)
+        return self.write_object(content_id, (
+            f'<< /Length {len(stream)} /Filter /FlateDecode >>'
+        ).encode(), stream) + self.write_object(page_id, (
+            f'<< /Type /Page /Parent {PAGES_ID} 0 R '
+            f'/MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] '
+            f'/Resources << /Font << /F1 {FONT_ID} 0 R >> >> '
+            f'/Contents {content_id} 0 R >>'
+        ).encode())
+
+    def write_font(self):
+        scale = 1000 / self.font.units_per_em
+        widths = ' '.join(
+            f'{glyph} [{round(self.font.get_advance(glyph) * scale)}]'
+            for glyph in sorted(self.used)
+        )
+        mappings = [
+            f'<{glyph:04X}> <{ord(char):04X}>'
+            for glyph, char in sorted(self.used.items())
+            if ord(char) <= 0xFFFF
+        ]
+        blocks = ''.join(
+            f'{len(block)} beginbfchar\n' + '\n'.join(block)
+            + '\nendbfchar\n'
+            for block in (
+                mappings[index:index + CMAP_BLOCK_SIZE]
+                for index in range(0, len(mappings), CMAP_BLOCK_SIZE)
+            )
+        )
+        cmap = (
+            '/CIDInit /ProcSet findresource begin 12 dict begin begincmap\n'
+            '/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) '
+            '/Supplement 0 >> def\n/CMapName /Adobe-Identity-UCS def\n'
+            '/CMapType 2 def\n1 begincodespacerange\n<0000> <FFFF>\n'
+            f'endcodespacerange\n{blocks}'
+            'endcmap CMapName currentdict /CMap defineresource pop end end'
+        ).encode()
+        bbox = ' '.join(str(round(value * scale)) for value in self.font.bbox)
+        return b''.join((
+            self.write_object(FONT_ID, (
+                f'<< /Type /Font /Subtype /Type0 /BaseFont /Font '
+                f'/Encoding /Identity-H '
+                f'/DescendantFonts [{CID_FONT_ID} 0 R] '
+                f'/ToUnicode {TO_UNICODE_ID} 0 R >>'
+            ).encode()),
+            self.write_object(CID_FONT_ID, (
+                f'<< /Type /Font /Subtype /CIDFontType2 /BaseFont /Font '
+                f'/CIDSystemInfo << /Registry (Adobe) /Ordering (Identity) '
+                f'/Supplement 0 >> /FontDescriptor {DESCRIPTOR_ID} 0 R '
+                f'/CIDToGIDMap /Identity /W [{widths}] >>'
+            ).encode()),
+            self.write_object(DESCRIPTOR_ID, (
+                f'<< /Type /FontDescriptor /FontName /Font /Flags 32 '
+                f'/FontBBox [{bbox}] /ItalicAngle 0 '
+                f'/Ascent {round(self.font.ascent * scale)} '
+                f'/Descent {round(self.font.descent * scale)} '
+                f'/CapHeight {round(self.font.ascent * scale)} /StemV 80 '
+                f'/FontFile2 {FONT_FILE_ID} 0 R >>'
+            ).encode()),
+            self.write_object(FONT_FILE_ID, (
+                f'<< /Length {len(self.font.compressed)} '
+                f'/Length1 {len(self.font.data)} /Filter /FlateDecode >>'
+            ).encode(), self.font.compressed),
+            self.write_object(TO_UNICODE_ID, (
+                f'<< /Length {len(cmap)} >>'
+            ).encode(), cmap),
+        ))
+
+    def write_trailer(self):
+        kids = ' '.join(f'{page_id} 0 R' for page_id in self.page_ids)
+        data = self.write_object(PAGES_ID, (
+            f'<< /Type /Pages /Kids [{kids}] '
+            f'/Count {len(self.page_ids)} >>'
+        ).encode()) + self.write_object(
+            CATALOG_ID, f'<< /Type /Catalog /Pages {PAGES_ID} 0 R >>'.encode()
+        )
+        xref_at = self.position
+        size = max(self.offsets) + 1
+        xref = [f'xref\n0 {size}\n', '0000000000 65535 f \n']
+        for number in range(1, size):
+            xref.append(f'{self.offsets[number]:010d} 00000 n \n')
+        xref.append(
+            f'trailer\n<< /Size {size} /Root {CATALOG_ID} 0 R >>\n'
+            f'startxref\n{xref_at}\n%%EOF\n'
+        )
+        return data + self.write(''.join(xref).encode())
+
+    def stream(self, title, lines):
+        yield self.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        width = PAGE_WIDTH - 2 * MARGIN
+        page = [(title, TITLE_SIZE)]
+        height = TITLE_SIZE + LEADING - FONT_SIZE
+        for text in lines:
+            for line in wrap(self.font, text, FONT_SIZE, width):
+                if height + LEADING > PAGE_HEIGHT - 2 * MARGIN:
+                    yield self.write_page(page)
+                    page, height = [], 0
+                page.append((line, FONT_SIZE))
+                height += LEADING
+        yield self.write_page(page)
+        yield self.write_font()
+        yield self.write_trailer()
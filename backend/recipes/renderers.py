@@ -0,0 +1,107 @@
+import csv
+import json
+import tempfile
+from abc import ABC, abstractmethod
+
+from django.conf import settings
+from rest_framework.renderers import BaseRenderer
+
+from .pdf import PDFWriter
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+class ShoppingCartRenderer(ABC, BaseRenderer):
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict):
+            return '\n'.join(f'{key}: {value}' for key, value in data.items())
+        return ''.join(self.stream(data))
+
+    def render_to_file(self, ingredients):
+        file = tempfile.SpooledTemporaryFile(
+            max_size=settings.SHOPPING_CART_SPOOL_SIZE
+        )
+        for chunk in self.stream(ingredients):
+            if isinstance(chunk, str):
+                chunk = chunk.encode(self.charset)
+            file.write(chunk)
+        file.seek(0)
+        return file
+
+    @abstractmethod
+    def stream(self, ingredients):
+        pass
+
+
+class ShoppingCartTextRenderer(ShoppingCartRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+
+    def stream(self, ingredients):
+        for name, measurement_unit, amount in ingredients:
+            yield f'{name} - {amount} {measurement_unit} \n'
+
+
+class ShoppingCartCSVRenderer(ShoppingCartRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def stream(self, ingredients):
+        writer = csv.writer(Echo())
+        yield writer.writerow(
+            ('Ингредиент', 'Количество', 'Единица измерения')
+        )
+        for name, measurement_unit, amount in ingredients:
+            yield writer.writerow((name, amount, measurement_unit))
+
+
+class ShoppingCartJSONRenderer(ShoppingCartRenderer):
+    media_type = 'application/json'
+    format = 'json'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict):
+            return json.dumps(data, ensure_ascii=False)
+        return super().render(data, accepted_media_type, renderer_context)
+
+    def stream(self, ingredients):
+        separator = ''
+        yield '['
+        for name, measurement_unit, amount in ingredients:
+            yield separator + json.dumps({
+                'name': name,
+                'measurement_unit': measurement_unit,
+                'amount': amount,
+            }, ensure_ascii=False)
+            separator = ','
+        yield ']'
+
+
+class ShoppingCartPDFRenderer(ShoppingCartRenderer):
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = None
+    title = 'Список покупок'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict):
+            return b''.join(self.write(
+                f'{key}: {value}' for key, value in data.items()
+            ))
+        return b''.join(self.stream(data))
+
+    def write(self, lines):
+        return PDFWriter(settings.SHOPPING_CART_PDF_FONT).stream(
+            self.title, lines
+        )
+
+    def stream(self, ingredients):
+        return self.write(
+            f'{name} - {amount} {measurement_unit}'
+            for name, measurement_unit, amount in ingredients
+        )
@@ -0,0 +1,126 @@
+import hashlib
+import random
+import time
+from contextlib import contextmanager
+
+from asgiref.local import Local
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+from rest_framework.permissions import SAFE_METHODS
+
+STICKY_KEY = 'replica:primary:{}'
+PRIMARY_APP_LABELS = ('authtoken', 'sessions')
+READ_STATEMENTS = ('SELECT', 'SAVEPOINT', 'RELEASE', 'ROLLBACK', 'EXPLAIN')
+LAG_SQL = (
+    'SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() '
+    'THEN 0 ELSE EXTRACT(EPOCH FROM now() - '
+    'pg_last_xact_replay_timestamp()) END'
+)
+
+state = Local()
+checks = {}
+
+
+def check_replica(alias):
+    connection = connections[alias]
+    try:
+        connection.ensure_connection()
+        if connection.vendor != 'postgresql':
+            return True
+        with connection.cursor() as cursor:
+            cursor.execute(LAG_SQL)
+            lag = cursor.fetchone()[0]
+    except DatabaseError:
+        return False
+    return lag is None or lag <= settings.REPLICA_MAX_LAG_SECONDS
+
+
+def is_replica_available(alias):
+    now = time.monotonic()
+    checked_at, available = checks.get(alias, (None, False))
+    if (checked_at is None
+            or now - checked_at >= settings.REPLICA_CHECK_SECONDS):
+        available = check_replica(alias)
+        checks[alias] = (now, available)
+    return available
+
+
+def choose_replica():
+    replicas = [
+        alias for alias in settings.REPLICA_DATABASES
+        if is_replica_available(alias)
+    ]
+    return random.choice(replicas) if replicas else None
+
+
+def get_sticky_key(request):
+    credentials = (request.META.get('HTTP_AUTHORIZATION')
+                   or request.COOKIES.get(settings.SESSION_COOKIE_NAME))
+    if credentials:
+        return STICKY_KEY.format(
+            hashlib.sha256(credentials.encode()).hexdigest()
+        )
+    return None
+
+
+def record_write(execute, sql, params, many, context):
+    if not sql.lstrip().upper().startswith(READ_STATEMENTS):
+        state.alias = None
+        state.wrote = True
+    return execute(sql, params, many, context)
+
+
+@contextmanager
+def primary():
+    alias = getattr(state, 'alias', None)
+    state.alias = None
+    try:
+        yield
+    finally:
+        state.alias = alias
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in PRIMARY_APP_LABELS:
+            return 'default'
+        return getattr(state, 'alias', None)
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {'default', *settings.REPLICA_DATABASES}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db in settings.REPLICA_DATABASES:
+            return False
+        return None
+
+
+class ReplicaMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.REPLICA_DATABASES:
+            return self.get_response(request)
+        key = get_sticky_key(request)
+        state.alias = None
+        state.wrote = False
+        if request.method in SAFE_METHODS and not (key and cache.get(key)):
+            state.alias = choose_replica()
+        try:
+            with connections['default'].execute_wrapper(record_write):
+                response = self.get_response(request)
+        finally:
+            wrote = state.wrote
+            state.alias = None
+            state.wrote = False
+        if key and (wrote or request.method not in SAFE_METHODS):
+            cache.set(key, True, settings.REPLICA_STICKY_SECONDS)
+        return response
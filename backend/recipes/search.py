@@ -0,0 +1,93 @@
+import re
+
+from django.conf import settings
+from django.db import connection, models
+from django.db.models import Value
+from django.db.models.expressions import RawSQL
+
+from .transactions import on_commit_batch
+
+SQLITE_TABLE = 'recipes_recipe_search'
+SQLITE_WEIGHTS = (10.0, 4.0, 2.0)
+
+POSTGRES_UPDATE = '''
+    UPDATE recipes_recipe SET search_vector =
+        setweight(to_tsvector(%(config)s, name), 'A')
+        || setweight(to_tsvector(%(config)s, coalesce((
+            SELECT string_agg(i.name, ' ')
+            FROM recipes_ingredientinrecipe ir
+            JOIN recipes_ingredient i ON i.id = ir.ingredient_id
+            WHERE ir.recipe_id = recipes_recipe.id
+        ), '')), 'B')
+        || setweight(to_tsvector(%(config)s, text), 'C')
+'''
+SQLITE_DELETE = f'DELETE FROM {SQLITE_TABLE}'
+SQLITE_INSERT = f'''
+    INSERT INTO {SQLITE_TABLE} (rowid, name, ingredients, text)
+    SELECT r.id, r.name, coalesce(group_concat(i.name, ' '), ''), r.text
+    FROM recipes_recipe r
+    LEFT JOIN recipes_ingredientinrecipe ir ON ir.recipe_id = r.id
+    LEFT JOIN recipes_ingredient i ON i.id = ir.ingredient_id
+'''
+
+
+def update_search_index(recipe_ids=None):
+    if recipe_ids is not None:
+        recipe_ids = list(recipe_ids)
+        if not recipe_ids:
+            return
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            params = {'config': settings.RECIPE_SEARCH_CONFIG}
+            sql = POSTGRES_UPDATE
+            if recipe_ids is not None:
+                sql += ' WHERE id = ANY(%(ids)s)'
+                params['ids'] = recipe_ids
+            cursor.execute(sql, params)
+        elif connection.vendor == 'sqlite':
+            delete, insert, params = SQLITE_DELETE, SQLITE_INSERT, []
+            if recipe_ids is not None:
+                placeholders = ', '.join(['%s'] * len(recipe_ids))
+                delete += f' WHERE rowid IN ({placeholders})'
+                insert += f' WHERE r.id IN ({placeholders})'
+                params = recipe_ids
+            cursor.execute(delete, params)
+            cursor.execute(insert + ' GROUP BY r.id', params)
+
+
+def schedule_search_update(recipe_ids):
+    on_commit_batch(update_search_index, recipe_ids)
+
+
+def search_recipes(queryset, query):
+    if connection.vendor == 'postgresql':
+        tsquery = 'websearch_to_tsquery(%s, %s)'
+        params = [settings.RECIPE_SEARCH_CONFIG, query]
+        return queryset.filter(RawSQL(
+            f'recipes_recipe.search_vector @@ {tsquery}', params,
+            output_field=models.BooleanField(),
+        )).annotate(search_rank=RawSQL(
+            f'ts_rank(recipes_recipe.search_vector, {tsquery})', params,
+            output_field=models.FloatField(),
+        ))
+    if connection.vendor == 'sqlite':
+        terms = re.findall(r'\w+', query)
+        if not terms:
+            return queryset.none().annotate(
+                search_rank=Value(0.0, models.FloatField())
+            )
+        match = ' '.join(f'"{term}"*' for term in terms)
+        weights = ', '.join(str(weight) for weight in SQLITE_WEIGHTS)
+        return queryset.filter(RawSQL(
+            f'recipes_recipe.id IN (SELECT rowid FROM {SQLITE_TABLE} '
+            f'WHERE {SQLITE_TABLE} MATCH %s)', [match],
+            output_field=models.BooleanField(),
+        )).annotate(search_rank=RawSQL(
+            f'(SELECT -bm25({SQLITE_TABLE}, {weights}) FROM {SQLITE_TABLE} '
+            f'WHERE {SQLITE_TABLE} MATCH %s '
+            f'AND rowid = recipes_recipe.id)', [match],
+            output_field=models.FloatField(),
+        ))
+    return queryset.filter(name__icontains=query).annotate(
+        search_rank=Value(0.0, models.FloatField())
+    )
@@ -0,0 +1,73 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.utils import timezone
+
+from .management.commands.load_ingredients import DEFAULT_PATH
+from .models import (Favorites, Follow, Ingredient, IngredientInRecipe,
+                     Purchase, Recipe, ShoppingCartIngredient, Tag,
+                     TimelineEntry, User, recompute_counters)
+from .search import update_search_index
+
+
+def seed_database(rng, users=200, recipes=2000, ingredients_per_recipe=8,
+                  follows=10, favorites=20, cart=10,
+                  ingredients_path=DEFAULT_PATH):
+    call_command('load_ingredients', path=ingredients_path,
+                 stdout=StringIO())
+    ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+    if len(ingredient_ids) < ingredients_per_recipe:
+        raise ValueError('Недостаточно ингредиентов в каталоге')
+    Tag.objects.bulk_create(
+        Tag(name=f'Тег {i}', color='#000000', slug=f'tag{i}')
+        for i in range(3)
+    )
+    tags = list(Tag.objects.all())
+    User.objects.bulk_create(
+        User(email=f'user{i}@example.com', username=f'user{i}',
+             first_name='Имя', last_name='Фамилия')
+        for i in range(users)
+    )
+    user_ids = list(User.objects.values_list('id', flat=True))
+    now = timezone.now()
+    Recipe.objects.bulk_create(
+        (Recipe(author_id=rng.choice(user_ids), name=f'Рецепт {i}',
+                image='recipes/benchmark.jpg', text='Описание ' * 20,
+                cooking_time=rng.randint(1, 120))
+         for i in range(recipes)),
+        batch_size=1000,
+    )
+    recipe_ids = list(Recipe.objects.values_list('id', flat=True))
+    Recipe.objects.update(pub_date=now)
+    Recipe.tags.through.objects.bulk_create(
+        (Recipe.tags.through(recipe_id=recipe_id,
+                             tag_id=rng.choice(tags).id)
+         for recipe_id in recipe_ids),
+        batch_size=1000,
+    )
+    IngredientInRecipe.objects.bulk_create(
+        (IngredientInRecipe(recipe_id=recipe_id,
+                            ingredient_id=ingredient_id,
+                            amount=rng.randint(1, 500))
+         for recipe_id in recipe_ids
+         for ingredient_id in rng.sample(
+             ingredient_ids, ingredients_per_recipe)),
+        batch_size=1000,
+    )
+    for model, field, ids, count in (
+        (Follow, 'author_id', user_ids, follows),
+        (Favorites, 'recipe_id', recipe_ids, favorites),
+        (Purchase, 'recipe_id', recipe_ids, cart),
+    ):
+        model.objects.bulk_create(
+            (model(user_id=user_id, **{field: related_id})
+             for user_id in user_ids
+             for related_id in rng.sample(ids, min(count, len(ids)))
+             if related_id != user_id or model is not Follow),
+            batch_size=1000,
+        )
+    recompute_counters()
+    ShoppingCartIngredient.objects.rebuild()
+    TimelineEntry.objects.rebuild()
+    update_search_index()
+    return user_ids, recipe_ids, ingredient_ids, tags
@@ -1,11 +1,11 @@
-import base64
-
-from django.core.files.base import ContentFile
-from django.shortcuts import get_object_or_404
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from .images import decode_base64_image, schedule_image_variants
 from .models import (Favorites, Follow, Ingredient, IngredientInRecipe,
-                     Purchase, Recipe, Tag)
+                     Purchase, Recipe, ShoppingCartIngredient, Tag)
 
 User = get_user_model()
 
@@ -23,6 +23,8 @@ class UserSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         if request is None or request.user.is_anonymous:
             return False
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         return Follow.objects.filter(user=request.user, author=obj.id).exists()
 
 
@@ -32,10 +34,26 @@ class IngredientSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'measurement_unit')
 
 
+class ImageVariantsField(serializers.ReadOnlyField):
+    def to_representation(self, value):
+        request = self.context.get('request')
+        variants = {}
+        for variant, formats in value.items():
+            variants[variant] = {}
+            for ext, name in formats.items():
+                url = default_storage.url(name)
+                if request is not None:
+                    url = request.build_absolute_uri(url)
+                variants[variant][ext] = url
+        return variants
+
+
 class FollowerRecipeSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'image_variants', 'cooking_time')
 
 
 class FollowerSerializer(serializers.ModelSerializer):
@@ -59,11 +77,17 @@ class FollowerSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         if not request or request.user.is_anonymous:
             return False
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         return Follow.objects.filter(
             user=obj.user, author=obj.author
         ).exists()
 
     def get_recipes(self, obj):
+        if hasattr(obj.author, 'limited_recipes'):
+            return FollowerRecipeSerializer(
+                obj.author.limited_recipes, many=True
+            ).data
         request = self.context.get('request')
         limit = request.GET.get('recipes_limit')
         queryset = Recipe.objects.filter(author=obj.author)
@@ -75,7 +99,7 @@ class FollowerSerializer(serializers.ModelSerializer):
         return FollowerRecipeSerializer(queryset, many=True).data
 
     def get_recipes_count(self, obj):
-        return Recipe.objects.filter(author=obj.author).count()
+        return obj.author.recipes_count
 
 
 class FollowSerializer(serializers.ModelSerializer):
@@ -87,26 +111,6 @@ class FollowSerializer(serializers.ModelSerializer):
         model = Follow
         fields = ('user', 'author')
 
-    def validate(self, data):
-        request = self.context.get('request')
-        author_id = data['author'].id
-        follow_exists = Follow.objects.filter(
-            user=request.user,
-            author__id=author_id
-        ).exists()
-
-        if request.method == 'GET':
-            if request.user.id == author_id:
-                raise serializers.ValidationError(
-                    'Нельзя подписаться на себя'
-                )
-            if follow_exists:
-                raise serializers.ValidationError(
-                    'Вы уже подписаны на этого пользователя'
-                )
-
-        return data
-
 
 class IngredientInRecipeSerializer(serializers.ModelSerializer):
     id = serializers.PrimaryKeyRelatedField(read_only=True)
@@ -129,15 +133,14 @@ class TagSerializer(serializers.ModelSerializer):
 class Base64ImageField(serializers.ImageField):
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith('data:image'):
-            format, imgstr = data.split(';base64,')
-            ext = format.split('/')[-1]
-            data = ContentFile(base64.b64decode(imgstr), name='temp.' + ext)
+            data = decode_base64_image(data)
 
         return super().to_internal_value(data)
 
 
 class RecipeSerializer(serializers.ModelSerializer):
     image = Base64ImageField()
+    image_variants = ImageVariantsField()
     author = UserSerializer(read_only=True)
     tags = TagSerializer(many=True, read_only=True)
     ingredients = IngredientInRecipeSerializer(
@@ -151,81 +154,168 @@ class RecipeSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Recipe
-        fields = ('__all__')
+        fields = ('id', 'tags', 'author', 'ingredients', 'is_favorited',
+                  'is_in_shopping_cart', 'name', 'image', 'image_variants',
+                  'text', 'cooking_time', 'pub_date')
 
     def get_is_favorited(self, obj):
         request = self.context.get('request')
         if request is None or request.user.is_anonymous:
             return False
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         return Favorites.objects.filter(user=request.user, recipe=obj).exists()
 
     def get_is_in_shopping_cart(self, obj):
         request = self.context.get('request')
         if request is None or request.user.is_anonymous:
             return False
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         return Purchase.objects.filter(user=request.user, recipe=obj).exists()
 
-    def validate(self, data):
-        ingredients = self.initial_data.get('ingredients')
-        ingredients_set = set()
+    def validate_ids(self, ids, message):
+        try:
+            return [int(id) for id in ids]
+        except (TypeError, ValueError):
+            raise serializers.ValidationError(message)
+
+    def validate_ingredient_amounts(self, ingredients):
+        amounts = {}
         for ingredient in ingredients:
-            if int(ingredient.get('amount')) <= 0:
+            try:
+                id = int(ingredient.get('id'))
+                amount = int(ingredient.get('amount'))
+            except (TypeError, ValueError):
+                raise serializers.ValidationError(
+                    'Укажите id и количество ингредиента целыми числами.'
+                )
+            if amount <= 0:
                 raise serializers.ValidationError(
                     ('Убедитесь, что значение количества '
                      'ингредиента больше 0')
                 )
-            id = ingredient.get('id')
-            if id in ingredients_set:
+            if id in amounts:
                 raise serializers.ValidationError(
                     'Ингредиент в рецепте не должен повторяться.'
                 )
-            ingredients_set.add(id)
-        data['ingredients'] = ingredients
-
-        return data
+            amounts[id] = amount
+        missing = set(amounts) - set(Ingredient.objects.in_bulk(amounts))
+        if missing:
+            raise serializers.ValidationError(
+                f'Ингредиенты не найдены: {sorted(missing)}'
+            )
+        return amounts
 
-    def create(self, validated_data):
-        image = validated_data.pop('image')
-        ingredients = validated_data.pop('ingredients')
-        recipe = Recipe.objects.create(image=image, **validated_data)
+    def validate(self, data):
+        for field in ('ingredients', 'tags'):
+            value = self.initial_data.get(field)
+            if not value and not (self.partial and value is None):
+                raise serializers.ValidationError(
+                    {field: 'Это поле не может быть пустым.'}
+                )
+        ingredients = self.initial_data.get('ingredients')
+        if ingredients is not None:
+            data['ingredients'] = self.validate_ingredient_amounts(
+                ingredients
+            )
         tags = self.initial_data.get('tags')
+        if tags is not None:
+            tag_ids = self.validate_ids(tags, 'Укажите id тегов числами.')
+            missing = set(tag_ids) - set(Tag.objects.in_bulk(tag_ids))
+            if missing:
+                raise serializers.ValidationError(
+                    f'Теги не найдены: {sorted(missing)}'
+                )
+            data['tags'] = tag_ids
 
-        for tag_id in tags:
-            recipe.tags.add(get_object_or_404(Tag, pk=tag_id))
+        return data
 
-        for ingredient in ingredients:
-            IngredientInRecipe.objects.create(
-                recipe=recipe,
-                ingredient_id=ingredient.get('id'),
-                amount=ingredient.get('amount')
-            )
+    @transaction.atomic
+    def create(self, validated_data):
+        tags = validated_data.pop('tags', [])
+        amounts = validated_data.pop('ingredients', {})
+        recipe = Recipe.objects.create(**validated_data)
+        validated_data['image'].close()
+        recipe.tags.set(tags)
+        IngredientInRecipe.objects.bulk_create(
+            IngredientInRecipe(recipe=recipe, ingredient_id=ingredient_id,
+                               amount=amount)
+            for ingredient_id, amount in amounts.items()
+        )
+        schedule_image_variants(recipe.id)
 
         return recipe
 
+    def update_ingredients(self, instance, amounts):
+        rows = {
+            row.ingredient_id: row
+            for row in IngredientInRecipe.objects.filter(recipe=instance)
+        }
+        old_amounts = {
+            ingredient_id: row.amount for ingredient_id, row in rows.items()
+        }
+        removed = [
+            row.id for ingredient_id, row in rows.items()
+            if ingredient_id not in amounts
+        ]
+        if removed:
+            IngredientInRecipe.objects.filter(id__in=removed).delete()
+        changed = []
+        for ingredient_id, amount in amounts.items():
+            row = rows.get(ingredient_id)
+            if row is not None and row.amount != amount:
+                row.amount = amount
+                changed.append(row)
+        if changed:
+            IngredientInRecipe.objects.bulk_update(changed, ['amount'])
+        IngredientInRecipe.objects.bulk_create(
+            IngredientInRecipe(recipe=instance, ingredient_id=ingredient_id,
+                               amount=amount)
+            for ingredient_id, amount in amounts.items()
+            if ingredient_id not in rows
+        )
+        ShoppingCartIngredient.objects.update_recipe(
+            instance.id, old_amounts, amounts
+        )
+
+    @transaction.atomic
     def update(self, instance, validated_data):
-        instance.tags.clear()
-        tags = self.initial_data.get('tags')
+        tags = validated_data.pop('tags', None)
+        amounts = validated_data.pop('ingredients', None)
+        if tags is not None:
+            instance.tags.set(tags)
+        if amounts is not None:
+            self.update_ingredients(instance, amounts)
+
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+        instance.save()
+        if 'image' in validated_data:
+            validated_data['image'].close()
+            schedule_image_variants(instance.id)
 
-        for tag_id in tags:
-            instance.tags.add(get_object_or_404(Tag, pk=tag_id))
+        return instance
 
-        IngredientInRecipe.objects.filter(recipe=instance).delete()
-        for ingredient in validated_data.get('ingredients'):
-            ingredients_amounts = IngredientInRecipe.objects.create(
-                recipe=instance,
-                ingredient_id=ingredient.get('id'),
-                amount=ingredient.get('amount')
-            )
-            ingredients_amounts.save()
 
-        if validated_data.get('image') is not None:
-            instance.image = validated_data.get('image')
-        instance.name = validated_data.get('name')
-        instance.text = validated_data.get('text')
-        instance.cooking_time = validated_data.get('cooking_time')
-        instance.save()
+class RecipeMatchSerializer(RecipeSerializer):
+    matched_count = serializers.IntegerField(read_only=True)
+    missing_count = serializers.IntegerField(read_only=True)
 
-        return instance
+    class Meta(RecipeSerializer.Meta):
+        fields = (*RecipeSerializer.Meta.fields, 'matched_count',
+                  'missing_count')
+
+
+class BulkIdsSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.BULK_MAX_IDS,
+    )
+
+    def validate_ids(self, ids):
+        return list(dict.fromkeys(ids))
 
 
 class FavoriteSerializer(serializers.ModelSerializer):
@@ -236,21 +326,6 @@ class FavoriteSerializer(serializers.ModelSerializer):
         model = Favorites
         fields = ('user', 'recipe')
 
-    def validate(self, data):
-        request = self.context.get('request')
-        recipe_id = data['recipe'].id
-        favorite_exists = Favorites.objects.filter(
-            user=request.user,
-            recipe__id=recipe_id
-        ).exists()
-
-        if request.method == 'GET' and favorite_exists:
-            raise serializers.ValidationError(
-                'Рецепт уже добавлен в избранное'
-            )
-
-        return data
-
     def to_representation(self, instance):
         request = self.context.get('request')
         context = {'request': request}
@@ -262,25 +337,3 @@ class FavoriteSerializer(serializers.ModelSerializer):
 class PurchaseSerializer(FavoriteSerializer):
     class Meta(FavoriteSerializer.Meta):
         model = Purchase
-
-    def validate(self, data):
-        request = self.context.get('request')
-        recipe_id = data['recipe'].id
-        purchase_exists = Purchase.objects.filter(
-            user=request.user,
-            recipe__id=recipe_id
-        ).exists()
-
-        if request.method == 'POST' and purchase_exists:
-            raise serializers.ValidationError(
-                'Рецепт уже в списке покупок'
-            )
-
-        return data
-
-    def to_representation(self, instance):
-        request = self.context.get('request')
-        context = {'request': request}
-        return FollowerRecipeSerializer(
-            instance.recipe,
-            context=context).data
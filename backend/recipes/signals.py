@@ -0,0 +1,119 @@
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from .authentication import invalidate_tokens
+from .cache import bump_versions
+from .matching import schedule_index_update
+from .models import (Favorites, Follow, Ingredient, IngredientInRecipe,
+                     Purchase, Recipe, Tag, TimelineEntry, User,
+                     shift_counter)
+from .search import schedule_search_update
+
+
+@receiver(post_save, sender=Recipe)
+def increment_recipes_count(sender, instance, created, **kwargs):
+    if created:
+        shift_counter(User, instance.author_id, 'recipes_count', 1)
+
+
+@receiver(post_delete, sender=Recipe)
+def decrement_recipes_count(sender, instance, **kwargs):
+    shift_counter(User, instance.author_id, 'recipes_count', -1)
+
+
+@receiver(post_save, sender=Favorites)
+@receiver(post_save, sender=Purchase)
+def add_user_recipe(sender, instance, created, **kwargs):
+    if created:
+        sender.objects.recipes_added(instance.user_id, [instance.recipe_id])
+
+
+@receiver(pre_delete, sender=Favorites)
+@receiver(pre_delete, sender=Purchase)
+def remove_user_recipe(sender, instance, **kwargs):
+    sender.objects.recipes_removed(instance.user_id, [instance.recipe_id])
+
+
+@receiver(post_save, sender=Recipe)
+def fan_out_recipe(sender, instance, created, **kwargs):
+    if created:
+        TimelineEntry.objects.fan_out(instance)
+
+
+@receiver(post_save, sender=Follow)
+def add_follow(sender, instance, created, **kwargs):
+    if created:
+        Follow.objects.authors_added(instance.user_id, [instance.author_id])
+
+
+@receiver(post_delete, sender=Follow)
+def remove_follow(sender, instance, **kwargs):
+    Follow.objects.authors_removed(instance.user_id, [instance.author_id])
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def update_recipe_indexes(sender, instance, **kwargs):
+    schedule_search_update([instance.id])
+    schedule_index_update([instance.id])
+
+
+@receiver(post_save, sender=IngredientInRecipe)
+@receiver(post_delete, sender=IngredientInRecipe)
+def update_recipe_ingredients_indexes(sender, instance, **kwargs):
+    schedule_search_update([instance.recipe_id])
+    schedule_index_update([instance.recipe_id])
+
+
+@receiver(post_save, sender=Ingredient)
+def update_ingredient_name_search_index(sender, instance, created,
+                                        **kwargs):
+    if not created:
+        schedule_search_update(IngredientInRecipe.objects.filter(
+            ingredient=instance
+        ).values_list('recipe_id', flat=True))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tags_cache(sender, **kwargs):
+    bump_versions('tags', 'recipes')
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_ingredients_cache(sender, **kwargs):
+    bump_versions('ingredients', 'recipes')
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=IngredientInRecipe)
+@receiver(post_delete, sender=IngredientInRecipe)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_recipes_cache(sender, **kwargs):
+    bump_versions('recipes')
+
+
+@receiver(post_save, sender=User)
+def invalidate_authors_cache(sender, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    bump_versions('recipes')
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def invalidate_token(sender, instance, **kwargs):
+    invalidate_tokens([instance.key])
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_tokens(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_tokens(Token.objects.filter(
+            user=instance
+        ).values_list('key', flat=True))
@@ -0,0 +1,21 @@
+from django.db import transaction
+
+
+def on_commit_batch(func, ids, using=None):
+    connection = transaction.get_connection(using)
+    ids = list(ids)
+    if not connection.in_atomic_block:
+        func(ids)
+        return
+    batches = connection.__dict__.setdefault('on_commit_batches', {})
+    callback, pending = batches.get(func, (None, None))
+    if callback not in [entry[1] for entry in connection.run_on_commit]:
+        pending = set()
+
+        def callback():
+            batches.pop(func, None)
+            func(sorted(pending))
+
+        batches[func] = (callback, pending)
+        transaction.on_commit(callback, using)
+    pending.update(ids)
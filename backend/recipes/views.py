@@ -1,67 +1,122 @@
-from django.db.models import Exists, OuterRef, Sum
-from django.http.response import HttpResponse
+from django.db.models import Exists, OuterRef
+from django.http.response import FileResponse
 
+from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import (
     AllowAny, IsAuthenticated)
 from rest_framework.response import Response
 
-from .filters import IngredientNameFilter, RecipeFilter
-from .models import (Favorites, Follow, Ingredient,
-                     Purchase, Recipe, Tag, User)
-from .pagination import CustomPagination
+from .cache import CachedResponseMixin
+from .filters import (IngredientNameFilter, RecipeFilter,
+                      RecipeOrderingFilter, RecipeSearchFilter)
+from .matching import get_index
+from .models import (Favorites, Follow, Ingredient, Purchase, Recipe,
+                     ShoppingCartIngredient, Tag, User)
+from .pagination import (CursorPaginationMixin, CustomPagination,
+                         LatestCursorPagination, RecipeCursorPagination)
 from .permissions import IsOwnerOrAdminOrReadOnly, IsOwnerOrAdminOrReadOnlyUser
-from .serializers import (FavoriteSerializer, FollowSerializer,
-                          FollowerSerializer,
+from .renderers import (ShoppingCartCSVRenderer, ShoppingCartJSONRenderer,
+                        ShoppingCartPDFRenderer, ShoppingCartTextRenderer)
+from .serializers import (BulkIdsSerializer, FavoriteSerializer,
+                          FollowSerializer, FollowerSerializer,
                           IngredientSerializer, PurchaseSerializer,
-                          RecipeSerializer, TagSerializer,
-                          UserSerializer, IngredientInRecipe)
+                          RecipeMatchSerializer, RecipeSerializer,
+                          TagSerializer, UserSerializer)
 
+SHOPPING_CART_CHUNK_SIZE = 500
+INGREDIENT_AUTOCOMPLETE_LIMIT = 50
+INGREDIENT_AUTOCOMPLETE_MAX_LIMIT = 200
 
-class CustomUserViewSet(UserViewSet):
+
+def get_bulk_ids(request):
+    serializer = BulkIdsSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    return serializer.validated_data['ids']
+
+
+def get_bulk_response(ids, statuses):
+    return Response({'results': [
+        {'id': id, 'status': statuses.get(id, 'not_found')} for id in ids
+    ]})
+
+
+class CustomUserViewSet(CursorPaginationMixin, UserViewSet):
     def get_queryset(self):
-        return User.objects.all()
+        user = self.request.user
+        if user.is_anonymous:
+            return User.objects.all()
+        return User.objects.annotate(is_subscribed=Exists(
+            Follow.objects.filter(user=user, author=OuterRef('pk'))
+        ))
 
     pagination_class = CustomPagination
+    cursor_pagination_class = LatestCursorPagination
+    lookup_value_regex = r'\d+'
     permission_classes = (IsOwnerOrAdminOrReadOnlyUser,)
     serializer_class = UserSerializer
 
-    @action(detail=True,
+    @action(detail=True, methods=['get', 'post'],
             permission_classes=[IsAuthenticated])
     def subscribe(self, request, id=None):
         user = request.user
         author = get_object_or_404(User, id=id)
-
-        data = {
-            'user': user.id,
-            'author': author.id,
-        }
+        if author.id == user.id:
+            raise ValidationError({'errors': 'Нельзя подписаться на себя'})
+        status_code = status.HTTP_200_OK
+        if Follow.objects.add_author(user.id, author.id):
+            status_code = status.HTTP_201_CREATED
         serializer = FollowSerializer(
-            data=data, context={'request': request}
+            Follow(user=user, author=author), context={'request': request}
         )
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
 
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return Response(serializer.data, status=status_code)
 
     @subscribe.mapping.delete
     def delete_subscribe(self, request, id=None):
-        user = request.user
-        author = get_object_or_404(User, id=id)
-        subscribe = get_object_or_404(
-            Follow, user=user, author=author
-        )
-        subscribe.delete()
+        if not Follow.objects.remove_author(request.user.id, id):
+            raise ValidationError(
+                {'errors': 'Вы не подписаны на этого пользователя'}
+            )
 
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(detail=False, methods=['post', 'delete'],
+            url_path='subscribe', url_name='subscribe-bulk',
+            permission_classes=[IsAuthenticated])
+    def subscribe_bulk(self, request):
+        ids = get_bulk_ids(request)
+        user_id = request.user.id
+        if request.method == 'DELETE':
+            return get_bulk_response(ids, dict.fromkeys(
+                Follow.objects.remove_authors(user_id, ids), 'deleted'
+            ))
+        statuses = dict.fromkeys(
+            User.objects.filter(id__in=ids).values_list('id', flat=True),
+            'exists'
+        )
+        if user_id in statuses:
+            statuses[user_id] = 'self'
+        statuses.update(dict.fromkeys(Follow.objects.add_authors(user_id, [
+            id for id, status in statuses.items() if status == 'exists'
+        ]), 'created'))
+        return get_bulk_response(ids, statuses)
+
     @action(detail=False, permission_classes=[IsAuthenticated])
     def subscriptions(self, request):
         user = request.user
-        queryset = Follow.objects.filter(user=user)
+        recipes_limit = request.GET.get('recipes_limit')
+        if recipes_limit is not None and recipes_limit.isdigit():
+            recipes_limit = int(recipes_limit)
+        else:
+            recipes_limit = None
+        queryset = Follow.objects.filter(user=user).order_by(
+            '-id'
+        ).with_author_recipes(recipes_limit)
         pages = self.paginate_queryset(queryset)
         serializer = FollowerSerializer(
             pages,
@@ -71,44 +126,99 @@ class CustomUserViewSet(UserViewSet):
         return self.get_paginated_response(serializer.data)
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
+    cache_namespaces = ('tags',)
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = (AllowAny,)
     pagination_class = None
 
 
-class IngredientViewSet(viewsets.ModelViewSet):
+class IngredientViewSet(CachedResponseMixin, viewsets.ModelViewSet):
+    cache_namespaces = ('ingredients',)
     serializer_class = IngredientSerializer
     queryset = Ingredient.objects.all()
     pagination_class = None
     permission_classes = (AllowAny,)
     filterset_class = IngredientNameFilter
 
+    def get_autocomplete_params(self):
+        name = self.request.query_params.get('name', '').strip().lower()
+        if self.action != 'list' or not name:
+            return None
+        limit = self.request.query_params.get('limit')
+        if limit is not None and limit.isdigit() and int(limit) > 0:
+            limit = min(int(limit), INGREDIENT_AUTOCOMPLETE_MAX_LIMIT)
+        else:
+            limit = INGREDIENT_AUTOCOMPLETE_LIMIT
+        return name, limit
+
+    def get_cache_key(self, request):
+        params = self.get_autocomplete_params()
+        if params is None:
+            return super().get_cache_key(request)
+        return 'ingredients:autocomplete:{1}:{0}'.format(*params)
+
+    def autocomplete(self, request, *args, **kwargs):
+        serializer = self.get_serializer(
+            Ingredient.objects.autocomplete(*self.get_autocomplete_params()),
+            many=True,
+        )
+        return Response(serializer.data)
+
+    def list(self, request, *args, **kwargs):
+        if self.get_autocomplete_params() is None:
+            return super().list(request, *args, **kwargs)
+        return self.get_cached_response(
+            request, self.autocomplete, *args, **kwargs
+        )
+
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(CachedResponseMixin, CursorPaginationMixin,
+                    viewsets.ModelViewSet):
+    cache_namespaces = ('recipes',)
+    cache_actions = ('list',)
+    cache_anonymous_only = True
+    lookup_value_regex = r'\d+'
     queryset = Recipe.objects.all()
     serializer_class = RecipeSerializer
     permission_classes = (IsOwnerOrAdminOrReadOnly,)
     filter_class = RecipeFilter
+    filter_backends = (DjangoFilterBackend, RecipeSearchFilter,
+                       RecipeOrderingFilter)
     pagination_class = CustomPagination
+    cursor_pagination_class = RecipeCursorPagination
+
+    def get_cache_namespaces(self, request):
+        ordering = request.query_params.get(
+            RecipeOrderingFilter.ordering_param
+        )
+        if ordering in RecipeOrderingFilter.counter_orderings:
+            return (*self.cache_namespaces, 'recipe-counters')
+        return self.cache_namespaces
 
     def perform_create(self, serializer):
-        return serializer.save(author=self.request.user)
+        serializer.save(author=self.request.user)
+        serializer.instance = self.get_annotated_queryset().get(
+            pk=serializer.instance.pk
+        )
+
+    def perform_update(self, serializer):
+        serializer.save()
+        serializer.instance = self.get_annotated_queryset().get(
+            pk=serializer.instance.pk
+        )
+
+    def get_annotated_queryset(self):
+        user = self.request.user
+        return Recipe.objects.with_related(user).with_user_flags(user)
 
     def get_queryset(self):
         user = self.request.user
+        queryset = self.get_annotated_queryset()
 
         if user.is_anonymous:
-            return Recipe.objects.all()
-        queryset = Recipe.objects.annotate(
-            is_favorited=Exists(Favorites.objects.filter(
-                user=user, recipe_id=OuterRef('pk')
-            )),
-            is_in_shopping_cart=Exists(Purchase.objects.filter(
-                user=user, recipe_id=OuterRef('pk')
-            ))
-        )
+            return queryset
         if self.request.GET.get('is_favorited'):
             return queryset.filter(is_favorited=True)
         elif self.request.GET.get('is_in_shopping_cart'):
@@ -116,86 +226,150 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
         return queryset
 
-    @action(detail=True,
-            permission_classes=[IsAuthenticated])
-    def favorite(self, request, pk=None):
+    def add_recipe(self, request, pk, queryset, serializer_class):
         user = request.user
         recipe = get_object_or_404(Recipe, id=pk)
-
-        data = {
-            'user': user.id,
-            'recipe': recipe.id,
-        }
-        serializer = FavoriteSerializer(
-            data=data,
-            context={'request': request}
+        status_code = status.HTTP_200_OK
+        if queryset.add_recipe(user.id, recipe.id):
+            status_code = status.HTTP_201_CREATED
+        serializer = serializer_class(
+            queryset.model(user=user, recipe=recipe),
+            context={'request': request},
         )
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
 
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return Response(serializer.data, status=status_code)
 
-    @favorite.mapping.delete
-    def delete_favorite(self, request, pk=None):
-        user = request.user
-        recipe = get_object_or_404(Recipe, id=pk)
-        favorites = get_object_or_404(
-            Favorites, user=user, recipe=recipe
-        )
-        favorites.delete()
+    def remove_recipe(self, request, pk, queryset, message):
+        if not queryset.remove_recipe(request.user.id, pk):
+            raise ValidationError({'errors': message})
 
         return Response(status=status.HTTP_204_NO_CONTENT)
 
-    @action(detail=True,
+    @action(detail=True, methods=['get', 'post'],
             permission_classes=[IsAuthenticated])
-    def shopping_cart(self, request, pk=None):
-        user = request.user
-        recipe = get_object_or_404(Recipe, id=pk)
+    def favorite(self, request, pk=None):
+        return self.add_recipe(
+            request, pk, Favorites.objects, FavoriteSerializer
+        )
 
-        data = {
-            'user': user.id,
-            'recipe': recipe.id,
-        }
-        serializer = PurchaseSerializer(
-            data=data,
-            context={'request': request}
+    @favorite.mapping.delete
+    def delete_favorite(self, request, pk=None):
+        return self.remove_recipe(
+            request, pk, Favorites.objects, 'Рецепта нет в избранном'
         )
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
 
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+    @action(detail=True, methods=['get', 'post'],
+            permission_classes=[IsAuthenticated])
+    def shopping_cart(self, request, pk=None):
+        return self.add_recipe(
+            request, pk, Purchase.objects, PurchaseSerializer
+        )
 
     @shopping_cart.mapping.delete
     def delete_shopping_cart(self, request, pk=None):
-        user = request.user
-        recipe = get_object_or_404(Recipe, id=pk)
-        favorites = get_object_or_404(
-            Purchase, user=user, recipe=recipe
+        return self.remove_recipe(
+            request, pk, Purchase.objects, 'Рецепта нет в списке покупок'
         )
-        favorites.delete()
 
-        return Response(status=status.HTTP_204_NO_CONTENT)
+    def update_recipes_bulk(self, request, queryset):
+        ids = get_bulk_ids(request)
+        user_id = request.user.id
+        if request.method == 'DELETE':
+            return get_bulk_response(ids, dict.fromkeys(
+                queryset.remove_recipes(user_id, ids), 'deleted'
+            ))
+        statuses = dict.fromkeys(
+            Recipe.objects.filter(id__in=ids).values_list('id', flat=True),
+            'exists'
+        )
+        statuses.update(dict.fromkeys(
+            queryset.add_recipes(user_id, list(statuses)), 'created'
+        ))
+        return get_bulk_response(ids, statuses)
+
+    @action(detail=False, methods=['post', 'delete'],
+            url_path='favorite', url_name='favorite-bulk',
+            permission_classes=[IsAuthenticated])
+    def favorite_bulk(self, request):
+        return self.update_recipes_bulk(request, Favorites.objects)
+
+    @action(detail=False, methods=['post', 'delete'],
+            url_path='shopping_cart', url_name='shopping-cart-bulk',
+            permission_classes=[IsAuthenticated])
+    def shopping_cart_bulk(self, request):
+        return self.update_recipes_bulk(request, Purchase.objects)
 
     @action(detail=False, permission_classes=[IsAuthenticated])
+    def feed(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        ordering = tuple(queryset.query.order_by)
+        if (queryset.query.has_filters()
+                or ordering != RecipeOrderingFilter.default_ordering
+                or not isinstance(self.paginator, CustomPagination)):
+            queryset = queryset.in_feed(request.user)
+        else:
+            queryset = self.get_annotated_queryset().feed(request.user)
+        pages = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(pages, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False)
+    def match(self, request):
+        try:
+            ingredient_ids = {
+                int(ingredient_id)
+                for value in request.query_params.getlist('ingredients')
+                for ingredient_id in value.split(',') if ingredient_id
+            }
+        except ValueError:
+            raise ValidationError(
+                {'ingredients': 'Укажите id ингредиентов числами.'}
+            )
+        if not ingredient_ids:
+            raise ValidationError(
+                {'ingredients': 'Укажите хотя бы один ингредиент.'}
+            )
+        paginator = CustomPagination()
+        page = paginator.paginate_queryset(
+            get_index().match(ingredient_ids), request, view=self
+        )
+        recipes = self.get_queryset().in_bulk(
+            [recipe_id for recipe_id, matched, missing in page]
+        )
+        results = []
+        for recipe_id, matched, missing in page:
+            recipe = recipes.get(recipe_id)
+            if recipe is not None:
+                recipe.matched_count = matched
+                recipe.missing_count = missing
+                results.append(recipe)
+        serializer = RecipeMatchSerializer(
+            results, many=True, context=self.get_serializer_context()
+        )
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=False, permission_classes=[IsAuthenticated],
+            renderer_classes=[ShoppingCartTextRenderer,
+                              ShoppingCartCSVRenderer,
+                              ShoppingCartJSONRenderer,
+                              ShoppingCartPDFRenderer])
     def download_shopping_cart(self, request):
         user = self.request.user
         if user.is_anonymous:
             return Response(status=status.HTTP_401_UNAUTHORIZED)
-        ingredients = IngredientInRecipe.objects.select_related(
-            'recipes').filter(
-            recipe__customers__user=request.user
-        ).values(
-            'ingredient__name',
-            'ingredient__measurement_unit'
-        ).annotate(amount=Sum('amount')).values_list(
+        ingredients = ShoppingCartIngredient.objects.filter(
+            user=user
+        ).order_by('ingredient__name').values_list(
             'ingredient__name',
             'ingredient__measurement_unit', 'amount'
+        ).iterator(chunk_size=SHOPPING_CART_CHUNK_SIZE)
+        renderer = request.accepted_renderer
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type += f'; charset={renderer.charset}'
+        return FileResponse(
+            renderer.render_to_file(ingredients),
+            as_attachment=True,
+            filename=f'shoplist.{renderer.format}',
+            content_type=content_type,
         )
-        shopping_list = []
-        for name, measurement_unit, amount in ingredients:
-            shopping_list.append(f'{name} - {amount} '
-                                 f'{measurement_unit} \n')
-        response = HttpResponse(shopping_list, 'Content-Type: text/plain')
-        response['Content-Disposition'] = 'attachment; filename="shoplist.txt"'
-
-        return response
@@ -0,0 +1,30 @@
+import os
+import tempfile
+
+os.environ.setdefault('SECRET_KEY', 'test')
+
+from foodgram.settings import *  # noqa: E402,F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(tempfile.gettempdir(), 'foodgram.sqlite3'),
+        'TEST': {
+            'NAME': os.path.join(tempfile.gettempdir(),
+                                 'foodgram_test.sqlite3'),
+        },
+    },
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(tempfile.gettempdir(), 'foodgram.sqlite3'),
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+REPLICA_DATABASES = []
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+MEDIA_ROOT = tempfile.mkdtemp()
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
@@ -0,0 +1,58 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.authentication import (CachedTokenAuthentication,
+                                    get_cache_key, local_cache)
+from recipes.models import User
+
+
+class CachedTokenAuthenticationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            'user@example.com', 'user', 'Имя', 'Фамилия', 'password'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.addCleanup(local_cache.delete, self.token.key)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def get_me(self):
+        return self.client.get('/api/users/me/', HTTP_REFERER='/')
+
+    def test_warm_cache_authenticates_without_queries(self):
+        self.assertEqual(self.get_me().status_code, 200)
+        self.assertNotIn('password', cache.get(get_cache_key(self.token.key)))
+        with self.assertNumQueries(0):
+            user, token = CachedTokenAuthentication().authenticate_credentials(
+                self.token.key
+            )
+        self.assertEqual((user.pk, user.email), (self.user.pk,
+                                                 self.user.email))
+        self.assertEqual(self.get_me().data['id'], self.user.pk)
+
+    def test_cached_user_save_keeps_uncached_fields(self):
+        User.objects.filter(pk=self.user.pk).update(recipes_count=3)
+        self.assertEqual(self.get_me().status_code, 200)
+        user, token = CachedTokenAuthentication().authenticate_credentials(
+            self.token.key
+        )
+        user.first_name = 'Другое'
+        user.save()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.first_name, 'Другое')
+        self.assertEqual(self.user.recipes_count, 3)
+        self.assertTrue(self.user.check_password('password'))
+
+    def test_deactivation_invalidates_cached_token(self):
+        self.assertEqual(self.get_me().status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.get_me().status_code, 401)
+
+    def test_user_deletion_invalidates_cached_token(self):
+        self.assertEqual(self.get_me().status_code, 200)
+        self.user.delete()
+        self.assertEqual(self.get_me().status_code, 401)
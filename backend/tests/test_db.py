@@ -0,0 +1,39 @@
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from foodgram.db import close_unusable_connections, mark_connections_idle
+
+
+@override_settings(CONN_HEALTH_CHECK_IDLE_SECONDS=10)
+class ConnectionHealthCheckTest(SimpleTestCase):
+    def get_connection(self):
+        return SimpleNamespace(
+            connection=object(),
+            settings_dict={'CONN_HEALTH_CHECKS': True},
+            is_usable=mock.Mock(return_value=False),
+            close=mock.Mock(),
+        )
+
+    def run_request(self, connection):
+        with mock.patch('foodgram.db.connections') as connections:
+            connections.all.return_value = [connection]
+            close_unusable_connections(sender=None)
+
+    def test_skips_recently_used_connections(self):
+        connection = self.get_connection()
+        with mock.patch('foodgram.db.connections') as connections:
+            connections.all.return_value = [connection]
+            mark_connections_idle(sender=None)
+        self.run_request(connection)
+        connection.is_usable.assert_not_called()
+        connection.close.assert_not_called()
+
+    def test_closes_unusable_idle_connections(self):
+        connection = self.get_connection()
+        connection.idle_since = time.monotonic() - 11
+        self.run_request(connection)
+        connection.is_usable.assert_called_once_with()
+        connection.close.assert_called_once_with()
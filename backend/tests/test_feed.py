@@ -0,0 +1,76 @@
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from recipes.models import Follow, Recipe, TimelineEntry, User
+
+
+@override_settings(FEED_FANOUT_MAX_FOLLOWERS=1)
+class FeedTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.other, cls.author, cls.small = [
+            User.objects.create_user(f'{name}@example.com', name, 'Имя',
+                                     'Фамилия', 'password')
+            for name in ('user', 'other', 'author', 'small')
+        ]
+
+    def create_recipe(self, author, cooking_time=10):
+        return Recipe.objects.create(
+            author=author, name='Рецепт', image='recipes/1.jpg',
+            text='Описание', cooking_time=cooking_time,
+        )
+
+    def get_feed(self, query=''):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get(f'/api/recipes/feed/{query}', HTTP_REFERER='/')
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.data['results']]
+
+    def get_entries(self):
+        return set(TimelineEntry.objects.filter(
+            user=self.user
+        ).values_list('recipe_id', flat=True))
+
+    def test_merges_timeline_and_popular_authors(self):
+        Follow.objects.create(user=self.user, author=self.author)
+        Follow.objects.create(user=self.other, author=self.author)
+        Follow.objects.create(user=self.user, author=self.small)
+        recipes = [
+            self.create_recipe(author)
+            for author in (self.small, self.author, self.small, self.author)
+        ]
+        ids = [recipe.id for recipe in reversed(recipes)]
+        self.assertEqual(self.get_entries(), {recipes[0].id, recipes[2].id})
+        self.assertEqual(self.get_feed(), ids)
+        self.assertEqual(self.get_feed('?limit=3&page=2'), ids[3:])
+
+    def test_author_crossing_threshold(self):
+        Follow.objects.create(user=self.user, author=self.author)
+        first = self.create_recipe(self.author)
+        self.assertEqual(self.get_entries(), {first.id})
+        follow = Follow.objects.create(user=self.other, author=self.author)
+        self.assertEqual(self.get_entries(), set())
+        second = self.create_recipe(self.author)
+        self.assertEqual(self.get_feed(), [second.id, first.id])
+        follow.delete()
+        self.assertEqual(self.get_entries(), {first.id, second.id})
+        self.assertEqual(self.get_feed(), [second.id, first.id])
+
+    def test_ordering(self):
+        Follow.objects.create(user=self.user, author=self.author)
+        Follow.objects.create(user=self.other, author=self.author)
+        Follow.objects.create(user=self.user, author=self.small)
+        recipes = [
+            self.create_recipe(author, cooking_time)
+            for author, cooking_time in ((self.small, 40), (self.author, 30),
+                                         (self.small, 20), (self.author, 10))
+        ]
+        Recipe.objects.filter(pk=recipes[1].pk).update(favorites_count=2)
+        Recipe.objects.filter(pk=recipes[2].pk).update(favorites_count=1)
+        self.assertEqual(self.get_feed('?ordering=cooking_time'),
+                         [recipe.id for recipe in reversed(recipes)])
+        self.assertEqual(
+            self.get_feed('?ordering=popular'),
+            [recipes[1].id, recipes[2].id, recipes[3].id, recipes[0].id],
+        )
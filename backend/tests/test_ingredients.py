@@ -0,0 +1,52 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient
+
+
+class IngredientAutocompleteTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit='г')
+            for name in ('абрикос', 'соль абрикосовая', 'сахар')
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_prefix_matches_first(self):
+        response = self.client.get('/api/ingredients/?name=Абр')
+        self.assertEqual(
+            [item['name'] for item in response.data],
+            ['абрикос', 'соль абрикосовая'],
+        )
+
+    def test_cache_key_uses_normalized_prefix(self):
+        self.client.get('/api/ingredients/?name=Абр')
+        for name in ('абр', 'абр%20', '%20АБР'):
+            with self.subTest(name=name), self.assertNumQueries(0):
+                response = self.client.get(f'/api/ingredients/?name={name}')
+            self.assertEqual(len(response.data), 2)
+
+    def test_limit(self):
+        response = self.client.get('/api/ingredients/?name=абр&limit=1')
+        self.assertEqual([item['name'] for item in response.data],
+                         ['абрикос'])
+
+    def test_substring_fallback_needs_minimum_length(self):
+        response = self.client.get('/api/ingredients/?name=аб')
+        self.assertEqual([item['name'] for item in response.data],
+                         ['абрикос'])
+
+    def test_substring_index_follows_renames(self):
+        Ingredient.objects.filter(name='сахар').update(name='сахар-рафинад')
+        Ingredient.objects.filter(name='абрикос').delete()
+        response = self.client.get('/api/ingredients/?name=афин')
+        self.assertEqual([item['name'] for item in response.data],
+                         ['сахар-рафинад'])
+        response = self.client.get('/api/ingredients/?name=брик')
+        self.assertEqual([item['name'] for item in response.data],
+                         ['соль абрикосовая'])
@@ -0,0 +1,21 @@
+from django.test import SimpleTestCase
+
+from recipes.matching import IngredientIndex
+
+
+class IngredientIndexTest(SimpleTestCase):
+    def test_match_pages_follow_full_ordering(self):
+        index = IngredientIndex()
+        index.build([
+            (1, 1), (2, 1),
+            (1, 2), (2, 2), (3, 2),
+            (1, 3),
+            (1, 4), (4, 4),
+            (2, 5), (3, 5),
+        ])
+        results = index.match({1, 2, 3})
+        expected = [(2, 3, 0), (5, 2, 0), (1, 2, 0), (3, 1, 0), (4, 1, 1)]
+        self.assertEqual(len(results), 5)
+        self.assertEqual(results[:5], expected)
+        self.assertEqual(results[2:4], expected[2:4])
+        self.assertEqual(results[4], expected[4])
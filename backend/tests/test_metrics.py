@@ -0,0 +1,92 @@
+import json
+import os
+import tempfile
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from recipes.metrics import Registry, registry
+from recipes.models import (Ingredient, IngredientInRecipe, Purchase, Recipe,
+                            User)
+
+ROUTE = 'recipes-download-shopping-cart'
+REQUESTS_TOTAL = (
+    'foodgram_requests_total{{route="{}",method="GET",status="200"}} '
+)
+
+
+class MetricsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            'user@example.com', 'user', 'Имя', 'Фамилия', 'password'
+        )
+        recipe = Recipe.objects.create(
+            author=cls.user, name='Рецепт', image='recipes/1.jpg',
+            text='Описание', cooking_time=10,
+        )
+        ingredient = Ingredient.objects.create(name='Соль',
+                                               measurement_unit='г')
+        IngredientInRecipe.objects.create(recipe=recipe,
+                                          ingredient=ingredient, amount=5)
+        Purchase.objects.create(user=cls.user, recipe=recipe)
+
+    def get_observations(self):
+        histogram = registry.histograms['db_queries'].get((ROUTE, 'GET'))
+        if histogram is None:
+            return 0, 0
+        return sum(histogram.counts), histogram.sum
+
+    def test_streaming_body_queries_are_recorded(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        count, queries = self.get_observations()
+        response = client.get('/api/recipes/download_shopping_cart/',
+                              HTTP_REFERER='/')
+        self.assertEqual(self.get_observations(), (count, queries))
+        body = b''.join(response.streaming_content)
+        self.assertIn('Соль'.encode(), body)
+        new_count, new_queries = self.get_observations()
+        self.assertEqual(new_count, count + 1)
+        self.assertGreater(new_queries, queries)
+
+    @override_settings(METRICS_ALLOWED_IPS=['127.0.0.1'],
+                       METRICS_TOKEN='secret')
+    def test_metrics_access(self):
+        client = APIClient(REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(client.get('/metrics').status_code, 403)
+        self.assertEqual(
+            client.get('/metrics',
+                       HTTP_AUTHORIZATION='Bearer wrong').status_code, 403
+        )
+        self.assertEqual(
+            client.get('/metrics',
+                       HTTP_AUTHORIZATION='Bearer secret').status_code, 200
+        )
+        self.assertEqual(APIClient().get('/metrics').status_code, 200)
+
+    def get_requests_total(self, route):
+        prefix = REQUESTS_TOTAL.format(route)
+        body = APIClient().get('/metrics').content.decode()
+        for line in body.splitlines():
+            if line.startswith(prefix):
+                return int(line[len(prefix):])
+        return 0
+
+    def test_metrics_are_aggregated_across_processes(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        other = Registry()
+        other.observe('tags-list', 'GET', 200, {'db_queries': 1})
+        with open(os.path.join(directory.name, '1.json'), 'w') as file:
+            json.dump(other.dump(), file)
+        with override_settings(METRICS_DIR=directory.name):
+            registry.pid = None
+            APIClient().get('/api/tags/', HTTP_REFERER='/')
+            self.assertEqual(self.get_requests_total('tags-list'), 2)
+            registry.pid = None
+            APIClient().get('/api/tags/', HTTP_REFERER='/')
+            self.assertEqual(self.get_requests_total('tags-list'), 3)
+        self.assertTrue(os.path.exists(
+            os.path.join(directory.name, f'{os.getpid()}.json')
+        ))
@@ -0,0 +1,54 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from recipes.models import Recipe, User
+
+
+class RecipeCursorPaginationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(
+            'author@example.com', 'author', 'Имя', 'Фамилия', 'password'
+        )
+        for i in range(7):
+            Recipe.objects.create(
+                author=author, name=f'Рецепт {i}', image='recipes/1.jpg',
+                text='Описание', cooking_time=10 + i % 2,
+            )
+        Recipe.objects.update(pub_date=timezone.now())
+        cls.ids = sorted(
+            Recipe.objects.values_list('id', flat=True), reverse=True
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def walk(self, url, link):
+        client = APIClient()
+        pages = []
+        while url:
+            response = client.get(url, HTTP_REFERER='/')
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('o%3D', response.data[link] or '')
+            pages.append([recipe['id'] for recipe in response.data['results']])
+            url = response.data[link]
+        return pages, response
+
+    def test_ties_are_paged_by_position(self):
+        for ordering in ('', '&ordering=popular', '&ordering=trending'):
+            with self.subTest(ordering=ordering):
+                pages, _ = self.walk(
+                    f'/api/recipes/?pagination=cursor&limit=3{ordering}',
+                    'next',
+                )
+                self.assertEqual(sum(pages, []), self.ids)
+
+    def test_previous_pages(self):
+        pages, last = self.walk(
+            '/api/recipes/?pagination=cursor&limit=3&ordering=cooking_time',
+            'next',
+        )
+        backwards, _ = self.walk(last.data['previous'], 'previous')
+        self.assertEqual(backwards, pages[-2::-1])
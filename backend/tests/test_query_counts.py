@@ -0,0 +1,80 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes.models import (Favorites, Follow, Ingredient, IngredientInRecipe,
+                            Purchase, Recipe, Tag, User)
+
+
+class RecipeQueryCountTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            'user@example.com', 'user', 'Имя', 'Фамилия', 'password'
+        )
+        authors = [
+            User.objects.create_user(f'author{i}@example.com', f'author{i}',
+                                     'Имя', 'Фамилия', 'password')
+            for i in range(3)
+        ]
+        tags = [
+            Tag.objects.create(name=f'Тег {i}', color='#000000',
+                               slug=f'tag{i}')
+            for i in range(2)
+        ]
+        ingredients = [
+            Ingredient.objects.create(name=f'Ингредиент {i}',
+                                      measurement_unit='г')
+            for i in range(4)
+        ]
+        for i in range(12):
+            recipe = Recipe.objects.create(
+                author=authors[i % len(authors)], name=f'Рецепт {i}',
+                image='recipes/1.jpg', text='Описание', cooking_time=10,
+            )
+            recipe.tags.set(tags)
+            IngredientInRecipe.objects.bulk_create(
+                IngredientInRecipe(recipe=recipe, ingredient=ingredient,
+                                   amount=100)
+                for ingredient in ingredients
+            )
+            if i % 2:
+                Favorites.objects.create(user=cls.user, recipe=recipe)
+                Purchase.objects.create(user=cls.user, recipe=recipe)
+        Follow.objects.create(user=cls.user, author=authors[0])
+        cls.recipe = Recipe.objects.first()
+
+    def setUp(self):
+        cache.clear()
+        self.anonymous = APIClient()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assert_queries(self, client, url, count):
+        with self.assertNumQueries(count):
+            response = client.get(url, HTTP_REFERER='/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_list_anonymous(self):
+        for limit in (2, 10):
+            with self.subTest(limit=limit):
+                self.assert_queries(
+                    self.anonymous, f'/api/recipes/?limit={limit}', 5
+                )
+
+    def test_list_authenticated(self):
+        for limit in (2, 10):
+            with self.subTest(limit=limit):
+                self.assert_queries(
+                    self.client, f'/api/recipes/?limit={limit}', 5
+                )
+
+    def test_detail_anonymous(self):
+        self.assert_queries(
+            self.anonymous, f'/api/recipes/{self.recipe.id}/', 4
+        )
+
+    def test_detail_authenticated(self):
+        self.assert_queries(
+            self.client, f'/api/recipes/{self.recipe.id}/', 4
+        )
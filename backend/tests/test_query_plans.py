@@ -0,0 +1,153 @@
+import random
+import re
+from urllib.parse import quote
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import (INGREDIENT_TRIGRAM_TABLE, Favorites, Follow,
+                            Ingredient, IngredientInRecipe, Purchase, Recipe,
+                            ShoppingCartIngredient, TimelineEntry, User)
+from recipes.seeding import seed_database
+
+LARGE_TABLES = {
+    model._meta.db_table for model in (
+        Favorites, Follow, Ingredient, IngredientInRecipe, Purchase, Recipe,
+        Recipe.tags.through, ShoppingCartIngredient, TimelineEntry, Token,
+        User,
+    )
+}
+SQLITE_ALIAS = re.compile(r'"(\w+)" (?:AS )?"?([UT]\d+)"?')
+SQLITE_SCAN = re.compile(r'^SCAN (?:TABLE )?"?(\w+)"?(.*)$')
+SQLITE_PK_WALK = re.compile(
+    r'FROM "(\w+)" ORDER BY "\1"\."id" (?:ASC|DESC) '
+    r'LIMIT \d+(?: OFFSET \d+)?$'
+)
+POSTGRES_SCAN = re.compile(r'Seq Scan on (\w+)')
+SUBSTRING_INDEXES = {
+    'postgresql': 'recipes_ingredient_name_lower_trgm',
+    'sqlite': INGREDIENT_TRIGRAM_TABLE,
+}
+
+
+def get_plan(sql, params):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SET enable_seqscan = off')
+            try:
+                cursor.execute('EXPLAIN ' + sql, params)
+                return [row[0] for row in cursor.fetchall()]
+            finally:
+                cursor.execute('RESET enable_seqscan')
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def explain(sql, params):
+    plan = get_plan(sql, params)
+    if connection.vendor == 'postgresql':
+        return {
+            match.group(1) for line in plan
+            for match in POSTGRES_SCAN.finditer(line)
+        }
+    aliases = {alias: table for table, alias in SQLITE_ALIAS.findall(sql)}
+    bounded = SQLITE_PK_WALK.search(sql)
+    if bounded and not any('TEMP B-TREE' in line for line in plan):
+        aliases[bounded.group(1)] = None
+    scans = set()
+    for line in plan:
+        match = SQLITE_SCAN.match(line.strip())
+        if match and 'USING' not in match.group(2):
+            scans.add(aliases.get(match.group(1), match.group(1)))
+    return scans - {None}
+
+
+class QueryPlanTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_database(random.Random(0), users=30, recipes=300,
+                      ingredients_per_recipe=5, follows=5, favorites=10,
+                      cart=5)
+        cls.recipe = Recipe.objects.order_by('-pub_date', '-id').first()
+        cls.user = Purchase.objects.first().user
+        cls.follower = Follow.objects.first().user
+        cls.ingredients = ','.join(
+            str(ingredient_id) for ingredient_id in
+            cls.recipe.ingredients.values_list('id', flat=True)[:3]
+        )
+        cls.substring = Ingredient.objects.order_by('id').first().name[1:5]
+
+    def setUp(self):
+        cache.clear()
+
+    def get_next_page(self, url):
+        return APIClient().get(url, HTTP_REFERER='/').data['next']
+
+    def get_endpoints(self):
+        recipe = self.recipe
+        tag = recipe.tags.first()
+        return [
+            (None, '/api/recipes/'),
+            (self.user, '/api/recipes/'),
+            (self.user, '/api/recipes/?is_favorited=1'),
+            (self.user, '/api/recipes/?is_in_shopping_cart=1'),
+            (None, f'/api/recipes/?author={recipe.author_id}'
+                   f'&tags={tag.slug}'),
+            (None, '/api/recipes/?ordering=popular'),
+            (None, '/api/recipes/?ordering=trending'),
+            (None, '/api/recipes/?ordering=cooking_time'),
+            (None, '/api/recipes/?search=Рецепт'),
+            (None, '/api/recipes/?pagination=cursor'),
+            (None, self.get_next_page(
+                '/api/recipes/?pagination=cursor&ordering=popular'
+            )),
+            (None, f'/api/recipes/match/?ingredients={self.ingredients}'),
+            (self.user, f'/api/recipes/{recipe.id}/'),
+            (self.follower, '/api/recipes/feed/'),
+            (self.user, '/api/recipes/download_shopping_cart/'),
+            (self.user, '/api/recipes/download_shopping_cart/?format=csv'),
+            (self.follower, '/api/users/subscriptions/?recipes_limit=3'),
+            (self.user, '/api/users/'),
+            (None, '/api/ingredients/?name=а'),
+            (None, f'/api/ingredients/?name={quote(self.substring)}'),
+        ]
+
+    def test_no_full_scans_of_large_tables(self):
+        if connection.vendor not in ('postgresql', 'sqlite'):
+            self.skipTest(f'EXPLAIN для {connection.vendor} не поддерживается')
+        for user, url in self.get_endpoints():
+            client = APIClient()
+            if user is not None:
+                client.force_authenticate(user)
+            with self.subTest(url=url, user=user):
+                cache.clear()
+                with CaptureQueriesContext(connection) as queries:
+                    response = client.get(url, HTTP_REFERER='/')
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+                self.assertEqual(response.status_code, 200)
+                for query in queries.captured_queries:
+                    sql = query['sql']
+                    if not sql.lstrip().upper().startswith('SELECT'):
+                        continue
+                    self.assertFalse(
+                        explain(sql, ()) & LARGE_TABLES,
+                        f'Полное сканирование в {url}:\n{sql}',
+                    )
+
+    def test_ingredient_substring_fallback_uses_trigram_index(self):
+        if connection.vendor not in SUBSTRING_INDEXES:
+            self.skipTest(f'Нет индекса подстрок для {connection.vendor}')
+        with CaptureQueriesContext(connection) as queries:
+            response = APIClient().get(
+                f'/api/ingredients/?name={quote(self.substring)}',
+                HTTP_REFERER='/',
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 2)
+        plan = '\n'.join(get_plan(queries.captured_queries[-1]['sql'], ()))
+        self.assertIn(SUBSTRING_INDEXES[connection.vendor], plan)
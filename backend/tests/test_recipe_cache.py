@@ -0,0 +1,42 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes.models import Favorites, Recipe, User
+
+
+class RecipeCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            'user@example.com', 'user', 'Имя', 'Фамилия', 'password'
+        )
+        cls.recipes = [
+            Recipe.objects.create(
+                author=cls.user, name=f'Рецепт {i}', image='recipes/1.jpg',
+                text='Описание', cooking_time=10,
+            )
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def get_ids(self, url):
+        response = APIClient().get(url, HTTP_REFERER='/')
+        return [recipe['id'] for recipe in response.data['results']]
+
+    def test_counters_are_not_exposed(self):
+        response = APIClient().get('/api/recipes/', HTTP_REFERER='/')
+        recipe = response.data['results'][0]
+        for field in ('favorites_count', 'purchases_count',
+                      'trending_score'):
+            self.assertNotIn(field, recipe)
+
+    def test_popular_ordering_follows_favorites(self):
+        url = '/api/recipes/?ordering=popular'
+        first = self.recipes[0]
+        self.assertNotEqual(self.get_ids(url)[0], first.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            Favorites.objects.create(user=self.user, recipe=first)
+        self.assertEqual(self.get_ids(url)[0], first.id)
@@ -0,0 +1,72 @@
+import base64
+import io
+
+from django.test import TestCase
+from PIL import Image
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, Recipe, Tag, User
+
+
+def make_image():
+    buffer = io.BytesIO()
+    Image.new('RGB', (1, 1)).save(buffer, 'PNG')
+    return 'data:image/png;base64,' + base64.b64encode(
+        buffer.getvalue()
+    ).decode()
+
+
+class RecipeWriteValidationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            'user@example.com', 'user', 'Имя', 'Фамилия', 'password'
+        )
+        cls.tag = Tag.objects.create(name='Тег', color='#000000', slug='tag')
+        cls.ingredient = Ingredient.objects.create(name='Соль',
+                                                   measurement_unit='г')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get_data(self, **fields):
+        data = {
+            'name': 'Рецепт', 'text': 'Описание', 'cooking_time': 10,
+            'image': make_image(), 'tags': [self.tag.id],
+            'ingredients': [{'id': self.ingredient.id, 'amount': 5}],
+        }
+        data.update(fields)
+        return {key: value for key, value in data.items() if value is not None}
+
+    def create(self, **fields):
+        return self.client.post('/api/recipes/', self.get_data(**fields),
+                                format='json', HTTP_REFERER='/')
+
+    def test_create_requires_ingredients(self):
+        for ingredients in (None, []):
+            response = self.create(ingredients=ingredients)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('ingredients', response.data)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_create_requires_tags(self):
+        for tags in (None, []):
+            response = self.create(tags=tags)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('tags', response.data)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_partial_update_keeps_omitted_relations(self):
+        self.assertEqual(self.create().status_code, 201)
+        recipe = Recipe.objects.get()
+        response = self.client.patch(f'/api/recipes/{recipe.id}/',
+                                     {'name': 'Новое'}, format='json',
+                                     HTTP_REFERER='/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(recipe.tags.all()), [self.tag])
+        self.assertEqual(recipe.ingredients_amounts.count(), 1)
+        response = self.client.patch(f'/api/recipes/{recipe.id}/',
+                                     {'tags': []}, format='json',
+                                     HTTP_REFERER='/')
+        self.assertEqual(response.status_code, 400)
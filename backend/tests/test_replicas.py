@@ -0,0 +1,68 @@
+from contextlib import nullcontext
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import OperationalError, connections
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes import replicas
+from recipes.models import Recipe, User
+
+
+@override_settings(REPLICA_DATABASES=['replica'])
+class ReplicaRoutingTest(TransactionTestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        replicas.checks.clear()
+        self.addCleanup(replicas.checks.clear)
+        user = User.objects.create_user(
+            'user@example.com', 'user', 'Имя', 'Фамилия', 'password'
+        )
+        self.recipe = Recipe.objects.create(
+            author=user, name='Рецепт', image='recipes/1.jpg',
+            text='Описание', cooking_time=10,
+        )
+        token = Token.objects.create(user=user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def request(self, method, url, replica_error=None):
+        unavailable = nullcontext()
+        if replica_error is not None:
+            unavailable = mock.patch.object(
+                connections['replica'], 'ensure_connection',
+                side_effect=replica_error,
+            )
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica, \
+                unavailable:
+            response = getattr(self.client, method)(url, HTTP_REFERER='/')
+        self.assertLess(response.status_code, 300)
+        return len(primary), len(replica)
+
+    def test_safe_request_reads_from_replica(self):
+        primary, replica = self.request('get', '/api/recipes/feed/')
+        self.assertGreater(replica, 0)
+        self.assertEqual(primary, 1)
+
+    def test_write_makes_client_sticky_to_primary(self):
+        self.request('get', '/api/recipes/feed/')
+        primary, replica = self.request(
+            'post', f'/api/recipes/{self.recipe.id}/favorite/'
+        )
+        self.assertGreater(primary, 0)
+        primary, replica = self.request('get', '/api/recipes/feed/')
+        self.assertEqual(replica, 0)
+        self.assertGreater(primary, 1)
+
+    def test_unavailable_replica_falls_back_to_primary(self):
+        primary, replica = self.request('get', '/api/recipes/feed/',
+                                        replica_error=OperationalError)
+        self.assertEqual(replica, 0)
+        self.assertGreater(primary, 1)
+        self.assertEqual(replicas.checks['replica'][1], False)
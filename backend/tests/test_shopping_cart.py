@@ -0,0 +1,142 @@
+import os
+import re
+import unittest
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase, TransactionTestCase
+from rest_framework.authtoken.models import Token
+
+from recipes.models import (Ingredient, IngredientInRecipe, Purchase, Recipe,
+                            ShoppingCartIngredient, Tag, User)
+
+
+class ShoppingCartDownloadTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(
+            'user@example.com', 'user', 'Имя', 'Фамилия', 'password'
+        )
+        recipe = Recipe.objects.create(
+            author=user, name='Рецепт', image='recipes/1.jpg',
+            text='Описание', cooking_time=10,
+        )
+        for name in ('Соль', 'Мука'):
+            IngredientInRecipe.objects.create(
+                recipe=recipe, amount=5,
+                ingredient=Ingredient.objects.create(name=name,
+                                                     measurement_unit='г'),
+            )
+        Purchase.objects.create(user=user, recipe=recipe)
+        self.token = Token.objects.create(user=user)
+
+    @async_to_sync
+    async def download(self, format):
+        response = await AsyncClient().get(
+            f'/api/recipes/download_shopping_cart/?format={format}',
+            AUTHORIZATION=f'Token {self.token.key}',
+        )
+        return response, b''.join(response.streaming_content)
+
+    def test_download_over_asgi(self):
+        response, body = self.download('txt')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Disposition'],
+                         'attachment; filename="shoplist.txt"')
+        self.assertEqual(body.decode(), 'Мука - 5 г \nСоль - 5 г \n')
+        response, body = self.download('csv')
+        self.assertEqual(
+            body.decode().splitlines(),
+            ['Ингредиент,Количество,Единица измерения',
+             'Мука,5,г', 'Соль,5,г'],
+        )
+
+    @unittest.skipUnless(os.path.exists(settings.SHOPPING_CART_PDF_FONT),
+                         'Нет шрифта для PDF')
+    def test_pdf_download(self):
+        response, body = self.download('pdf')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(body.startswith(b'%PDF-1.4'))
+        self.assertTrue(body.endswith(b'%%EOF\n'))
+        xref_at = int(re.search(rb'startxref\n(\d+)', body).group(1))
+        entries = body[xref_at:].split(b'trailer')[0].splitlines()[3:]
+        for number, entry in enumerate(entries, start=1):
+            offset = int(entry.split()[0])
+            self.assertTrue(
+                body[offset:].startswith(f'{number} 0 obj'.encode())
+            )
+
+
+class ShoppingCartAdminTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            'admin@example.com', 'admin', 'Имя', 'Фамилия', 'password'
+        )
+        cls.user = User.objects.create_user(
+            'user@example.com', 'user', 'Имя', 'Фамилия', 'password'
+        )
+        cls.tag = Tag.objects.create(name='Тег', color='#000000', slug='tag')
+        cls.recipe = Recipe.objects.create(
+            author=cls.admin, name='Рецепт', image='recipes/1.jpg',
+            text='Описание', cooking_time=10,
+        )
+        cls.recipe.tags.set([cls.tag])
+        cls.salt, cls.flour = (
+            Ingredient.objects.create(name=name, measurement_unit='г')
+            for name in ('Соль', 'Мука')
+        )
+        cls.row = IngredientInRecipe.objects.create(
+            recipe=cls.recipe, ingredient=cls.salt, amount=5
+        )
+        Purchase.objects.create(user=cls.user, recipe=cls.recipe)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def get_cart(self):
+        return dict(ShoppingCartIngredient.objects.filter(
+            user=self.user
+        ).values_list('ingredient_id', 'amount'))
+
+    def test_ingredient_in_recipe_admin_updates_carts(self):
+        self.assertEqual(self.get_cart(), {self.salt.id: 5})
+        url = f'/admin/recipes/ingredientinrecipe/{self.row.id}/change/'
+        for ingredient, amount in ((self.salt, 8), (self.flour, 3)):
+            response = self.client.post(url, {
+                'recipe': self.recipe.id, 'ingredient': ingredient.id,
+                'amount': amount,
+            })
+            self.assertEqual(response.status_code, 302)
+            self.assertEqual(self.get_cart(), {ingredient.id: amount})
+        response = self.client.post(
+            '/admin/recipes/ingredientinrecipe/',
+            {'action': 'delete_selected', '_selected_action': [self.row.id],
+             'post': 'yes'},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.get_cart(), {})
+
+    def test_recipe_admin_inline_updates_carts(self):
+        prefix = 'ingredients_amounts'
+        response = self.client.post(
+            f'/admin/recipes/recipe/{self.recipe.id}/change/', {
+                'author': self.admin.id, 'name': 'Рецепт',
+                'text': 'Описание', 'cooking_time': 10,
+                'tags': [self.tag.id],
+                f'{prefix}-TOTAL_FORMS': 2, f'{prefix}-INITIAL_FORMS': 1,
+                f'{prefix}-MIN_NUM_FORMS': 1, f'{prefix}-MAX_NUM_FORMS': 1000,
+                f'{prefix}-0-id': self.row.id,
+                f'{prefix}-0-recipe': self.recipe.id,
+                f'{prefix}-0-ingredient': self.salt.id,
+                f'{prefix}-0-amount': 7,
+                f'{prefix}-1-recipe': self.recipe.id,
+                f'{prefix}-1-ingredient': self.flour.id,
+                f'{prefix}-1-amount': 2,
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.get_cart(),
+                         {self.salt.id: 7, self.flour.id: 2})
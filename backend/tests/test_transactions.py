@@ -0,0 +1,27 @@
+from django.db import transaction
+from django.test import TestCase
+
+from recipes.transactions import on_commit_batch
+
+
+class OnCommitBatchTest(TestCase):
+    def test_registers_one_callback_per_transaction(self):
+        calls = []
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            on_commit_batch(calls.append, [3, 1])
+            on_commit_batch(calls.append, [2, 3])
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(calls, [[1, 2, 3]])
+
+    def test_reregisters_after_savepoint_rollback(self):
+        calls = []
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    on_commit_batch(calls.append, [1])
+                    raise ValueError
+            except ValueError:
+                pass
+            on_commit_batch(calls.append, [2])
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(calls, [[2]])
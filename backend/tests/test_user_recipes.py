@@ -0,0 +1,151 @@
+import threading
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+
+from recipes.models import (Favorites, Follow, Ingredient, IngredientInRecipe,
+                            Purchase, Recipe, ShoppingCartIngredient, User)
+
+
+class UserRecipesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.author = [
+            User.objects.create_user(f'{name}@example.com', name, 'Имя',
+                                     'Фамилия', 'password')
+            for name in ('user', 'author')
+        ]
+        cls.ingredient = Ingredient.objects.create(name='Соль',
+                                                   measurement_unit='г')
+        cls.recipes = []
+        for i in range(3):
+            recipe = Recipe.objects.create(
+                author=cls.author, name=f'Рецепт {i}',
+                image='recipes/1.jpg', text='Описание', cooking_time=10,
+            )
+            IngredientInRecipe.objects.create(
+                recipe=recipe, ingredient=cls.ingredient, amount=10
+            )
+            cls.recipes.append(recipe)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def request(self, method, url, data=None):
+        return getattr(self.client, method)(
+            url, data, format='json', HTTP_REFERER='/'
+        )
+
+    def get_counters(self, field):
+        return list(Recipe.objects.order_by('id').values_list(
+            field, flat=True
+        ))
+
+    def get_cart(self):
+        return dict(ShoppingCartIngredient.objects.filter(
+            user=self.user
+        ).values_list('ingredient_id', 'amount'))
+
+    def test_single_and_bulk_paths_keep_counters(self):
+        first, second, third = (recipe.id for recipe in self.recipes)
+        for url, model, field in (
+            ('favorite', Favorites, 'favorites_count'),
+            ('shopping_cart', Purchase, 'purchases_count'),
+        ):
+            with self.subTest(url=url):
+                response = self.request('post',
+                                        f'/api/recipes/{first}/{url}/')
+                self.assertEqual(response.status_code, 201)
+                response = self.request('post', f'/api/recipes/{url}/',
+                                        {'ids': [first, second]})
+                self.assertEqual(
+                    [item['status'] for item in response.data['results']],
+                    ['exists', 'created'],
+                )
+                model.objects.create(user=self.user, recipe_id=third)
+                self.assertEqual(self.get_counters(field), [1, 1, 1])
+                response = self.request('delete',
+                                        f'/api/recipes/{second}/{url}/')
+                self.assertEqual(response.status_code, 204)
+                model.objects.filter(recipe_id=third).delete()
+                self.assertEqual(self.get_counters(field), [1, 0, 0])
+        self.assertEqual(self.get_cart(), {self.ingredient.id: 10})
+        self.request('delete', '/api/recipes/shopping_cart/',
+                     {'ids': [first, second]})
+        self.assertEqual(self.get_cart(), {})
+
+    def test_subscriptions_keep_followers_count(self):
+        url = f'/api/users/{self.author.id}/subscribe/'
+        self.assertEqual(self.request('post', url).status_code, 201)
+        self.assertEqual(self.request('post', url).status_code, 200)
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.followers_count, 1)
+        response = self.request('delete', '/api/users/subscribe/',
+                                {'ids': [self.author.id]})
+        self.assertEqual(response.data['results'][0]['status'], 'deleted')
+        self.assertFalse(Follow.objects.exists())
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.followers_count, 0)
+
+
+class ConcurrentToggleTest(TransactionTestCase):
+    threads = 6
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            'user@example.com', 'user', 'Имя', 'Фамилия', 'password'
+        )
+        self.recipe = Recipe.objects.create(
+            author=self.user, name='Рецепт', image='recipes/1.jpg',
+            text='Описание', cooking_time=10,
+        )
+        self.ingredient = Ingredient.objects.create(name='Соль',
+                                                    measurement_unit='г')
+        IngredientInRecipe.objects.create(
+            recipe=self.recipe, ingredient=self.ingredient, amount=10
+        )
+
+    def run_concurrently(self, method, url):
+        barrier = threading.Barrier(self.threads)
+        statuses = []
+
+        def send():
+            client = APIClient()
+            client.force_authenticate(self.user)
+            try:
+                barrier.wait()
+                response = getattr(client, method)(url, HTTP_REFERER='/')
+                statuses.append(response.status_code)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=send) for _ in range(self.threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return sorted(statuses)
+
+    def test_toggle_in_both_directions(self):
+        for url, field, cart in (
+            ('favorite', 'favorites_count', []),
+            ('shopping_cart', 'purchases_count', [10]),
+        ):
+            with self.subTest(url=url):
+                url = f'/api/recipes/{self.recipe.id}/{url}/'
+                self.assertEqual(self.run_concurrently('post', url),
+                                 [200] * (self.threads - 1) + [201])
+                self.recipe.refresh_from_db()
+                self.assertEqual(getattr(self.recipe, field), 1)
+                self.assertEqual(list(
+                    ShoppingCartIngredient.objects.values_list(
+                        'amount', flat=True
+                    )
+                ), cart)
+                self.assertEqual(self.run_concurrently('delete', url),
+                                 [204] + [400] * (self.threads - 1))
+                self.recipe.refresh_from_db()
+                self.assertEqual(getattr(self.recipe, field), 0)
+        self.assertFalse(ShoppingCartIngredient.objects.exists())
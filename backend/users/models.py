@@ -1,6 +1,8 @@
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db import models
 
+from foodgram.mixins import CounterFieldsMixin
+
 
 class CustomUserManager(BaseUserManager):
     def create_user(self, email, username, first_name,
@@ -35,7 +37,7 @@ class CustomUserManager(BaseUserManager):
         return user
 
 
-class CustomUser(AbstractUser):
+class CustomUser(CounterFieldsMixin, AbstractUser):
     email = models.EmailField(
         max_length=254, unique=True,
         verbose_name='email'
@@ -53,6 +55,17 @@ class CustomUser(AbstractUser):
         verbose_name='Фамилия'
     )
 
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество рецептов'
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество подписчиков'
+    )
+
     is_active = models.BooleanField(default=True)
     is_admin = models.BooleanField(default=False)
     is_staff = models.BooleanField(default=False)
@@ -62,6 +75,8 @@ class CustomUser(AbstractUser):
 
     objects = CustomUserManager()
 
+    counter_fields = ('recipes_count', 'followers_count')
+
     class Meta:
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'